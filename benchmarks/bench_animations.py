@@ -0,0 +1,238 @@
+###################################################################################################
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+###################################################################################################
+#
+#   Benchmark of the animation export path, on synthetic rigs.
+#   Builds armatures of various bone counts (a tree of 4 children per bone), with an action keyed on
+#   the location and rotation of every bone, with or without a constraint on every other bone.
+#   Each stage is timed on its own, with fresh export settings so that no cached result is reused:
+#
+#       needs_baking                 on every channel group of the action
+#       bake_armature_actions        the single baking pass over the timeline
+#       gather_keyframes             every baked bone channel, from the baked matrices
+#       gather_animation_sampler     every baked bone channel, including gather_keyframes
+#       gather_animation_channels    the whole action, including gather_animation_sampler
+#
+#   Results are written to a JSON file, to compare them between versions.
+#
+#   Run with:
+#       blender --background --python benchmarks/bench_animations.py -- \
+#           [--bones 10,100,1000] [--frames 100,1000,5000] [--constraints both|on|off] [--output results.json]
+#
+###################################################################################################
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bpy
+import numpy as np
+
+from io_scene_gltf2_msfs import bl_info
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_bake
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_gather_animations
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_gather_animation_channels
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_gather_animation_samplers
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_gather_animation_sampler_keyframes
+
+BAKED_CHANNELS = {"location": 3, "rotation_quaternion": 4, "scale": 3}
+KEY_INTERVAL = 10
+
+__run_id = 0
+
+
+def make_export_settings(bake_store):
+    """Export settings of a sampled animation export. Each call returns settings that invalidate the caches."""
+    global __run_id
+    __run_id += 1
+    return {
+        'bench_run': __run_id,
+        'gltf_animations': True,
+        'gltf_apply': False,
+        'gltf_active_collection': False,
+        'gltf_bake_cache_size': 4096,
+        'gltf_bake_store': bake_store,
+        'gltf_cameras': False,
+        'gltf_def_bones': False,
+        'gltf_extras': False,
+        'gltf_force_sampling': True,
+        'gltf_frame_range': False,
+        'gltf_frame_step': 1,
+        'gltf_lights': False,
+        'gltf_nla_strips': True,
+        'gltf_parallel_animations': False,
+        'gltf_reduce_keyframes': False,
+        'gltf_reduce_location_tolerance': 0.0001,
+        'gltf_reduce_rotation_tolerance': 0.001,
+        'gltf_reduce_scale_tolerance': 0.0001,
+        'gltf_renderable': False,
+        'gltf_sampler_output_jobs': None,
+        'gltf_selected': False,
+        'gltf_skins': True,
+        'gltf_user_extensions': [],
+        'gltf_visible': False,
+        'gltf_yup': True,
+    }
+
+
+def make_rig(bone_count, frame_count, constraints, seed=0):
+    """Build an armature of bone_count bones, animated over frame_count frames. Returns it with its channel groups."""
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    scene = bpy.context.scene
+    scene.frame_start = 0
+    scene.frame_end = frame_count - 1
+
+    armature = bpy.data.objects.new('Armature', bpy.data.armatures.new('Armature'))
+    scene.collection.objects.link(armature)
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bones = []
+    for i in range(bone_count):
+        edit_bone = armature.data.edit_bones.new('Bone.{:04d}'.format(i))
+        parent = edit_bones[(i - 1) // 4] if i > 0 else None
+        edit_bone.head = parent.tail if parent is not None else (0.0, 0.0, 0.0)
+        edit_bone.tail = (edit_bone.head[0] + 0.1 * (i % 3), edit_bone.head[1] + 0.1 * (i % 2), edit_bone.head[2] + 1.0)
+        edit_bone.parent = parent
+        edit_bones.append(edit_bone)
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    if constraints:
+        target = bpy.data.objects.new('Target', None)
+        scene.collection.objects.link(target)
+        target.location = (1.0, 2.0, 3.0)
+        for pose_bone in armature.pose.bones[::2]:
+            constraint = pose_bone.constraints.new('DAMPED_TRACK')
+            constraint.target = target
+            constraint.influence = 0.5
+
+    rng = np.random.default_rng(seed)
+    action = bpy.data.actions.new('Action')
+    armature.animation_data_create()
+    armature.animation_data.action = action
+    key_frames = np.arange(0, frame_count, KEY_INTERVAL, dtype=np.float32)
+    groups = []
+    for pose_bone in armature.pose.bones:
+        pose_bone.rotation_mode = 'QUATERNION'
+        for data_path, length in (('location', 3), ('rotation_quaternion', 4)):
+            group = []
+            for index in range(length):
+                fcurve = action.fcurves.new('pose.bones["{}"].{}'.format(pose_bone.name, data_path), index=index,
+                                            action_group=pose_bone.name)
+                values = rng.normal(scale=0.5, size=len(key_frames)).astype(np.float32)
+                if data_path == 'rotation_quaternion' and index == 0:
+                    values += 1.0
+                fcurve.keyframe_points.add(len(key_frames))
+                fcurve.keyframe_points.foreach_set('co', np.column_stack([key_frames, values]).reshape(-1))
+                fcurve.update()
+                group.append(fcurve)
+            groups.append(tuple(group))
+
+    return armature, action, groups
+
+
+def time_stage(stage):
+    start_time = time.perf_counter()
+    stage()
+    return time.perf_counter() - start_time
+
+
+def run(bone_count, frame_count, constraints):
+    armature, action, groups = make_rig(bone_count, frame_count, constraints)
+    frame_start, frame_end = action.frame_range
+    bone_names = [bone.name for bone in armature.pose.bones]
+    bake_store = gltf2_blender_bake.BakeStore(4096 * 1024 * 1024)
+    timings = {}
+
+    export_settings = make_export_settings(bake_store)
+    timings['needs_baking'] = time_stage(lambda: [
+        gltf2_blender_gather_animation_sampler_keyframes.needs_baking(armature, group, export_settings)
+        for group in groups
+    ])
+
+    export_settings = make_export_settings(bake_store)
+    timings['bake_armature_actions'] = time_stage(
+        lambda: gltf2_blender_gather_animations.bake_armature_actions([armature], bake_store, export_settings))
+
+    # The next stages read the matrices baked above
+    export_settings = make_export_settings(bake_store)
+    timings['gather_keyframes'] = time_stage(lambda: [
+        gltf2_blender_gather_animation_sampler_keyframes.gather_keyframes(
+            armature, (), (None,) * length, bone_name, channel, frame_start, frame_end, action.name, None, True,
+            export_settings)
+        for bone_name in bone_names for channel, length in BAKED_CHANNELS.items()
+    ])
+
+    export_settings = make_export_settings(bake_store)
+    timings['gather_animation_sampler'] = time_stage(lambda: [
+        gltf2_blender_gather_animation_samplers.gather_animation_sampler(
+            (), armature, bone_name, channel, frame_start, frame_end, action.name, None, True, export_settings)
+        for bone_name in bone_names for channel in BAKED_CHANNELS
+    ])
+
+    export_settings = make_export_settings(bake_store)
+    channels = []
+    timings['gather_animation_channels'] = time_stage(lambda: channels.extend(
+        gltf2_blender_gather_animation_channels.gather_animation_channels(action, armature, export_settings)))
+
+    bake_store.clear()
+    return {
+        'bones': bone_count,
+        'frames': frame_count,
+        'constraints': constraints,
+        'fcurves': len(action.fcurves),
+        'channels': len(channels),
+        'stages': timings,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='bench_animations.py')
+    parser.add_argument('--bones', default='10,100,1000', help='comma separated bone counts')
+    parser.add_argument('--frames', default='100,1000,5000', help='comma separated frame counts')
+    parser.add_argument('--constraints', default='both', choices=('both', 'on', 'off'))
+    parser.add_argument('--output', default='bench_animations.json', help='JSON file to write the results to')
+    args = parser.parse_args(argv)
+
+    constraints = {'both': (False, True), 'on': (True,), 'off': (False,)}[args.constraints]
+    results = []
+    for bone_count in [int(b) for b in args.bones.split(',')]:
+        for frame_count in [int(f) for f in args.frames.split(',')]:
+            for with_constraints in constraints:
+                result = run(bone_count, frame_count, with_constraints)
+                results.append(result)
+                print('{:5d} bones, {:5d} frames, constraints {:3}: {}'.format(
+                    bone_count, frame_count, 'on' if with_constraints else 'off',
+                    ', '.join('{} {:.3f} s'.format(stage, t) for stage, t in result['stages'].items())))
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'addon_version': '.'.join(str(v) for v in bl_info['version']),
+            'blender_version': bpy.app.version_string,
+            'python_version': platform.python_version(),
+            'machine': platform.machine(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'results': results,
+        }, f, indent=2)
+    print('Results written to {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main(sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else [])
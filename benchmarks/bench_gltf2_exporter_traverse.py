@@ -0,0 +1,218 @@
+###################################################################################################
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+###################################################################################################
+#
+#   Benchmark of the GlTF2Exporter scene graph traversal.
+#   Compares the former reflection based traversal (dir() on every property) with the
+#   typed visitor of GlTF2Exporter, on a synthetic scene. Both deduplicate root objects the
+#   same way, so that only the traversal differs, and must build the same root lists.
+#
+#   Run with:
+#       blender --background --python benchmarks/bench_gltf2_exporter_traverse.py -- [node_count]
+#
+###################################################################################################
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from io_scene_gltf2_msfs.io.com import gltf2_io
+from io_scene_gltf2_msfs.io.com import gltf2_io_constants
+from io_scene_gltf2_msfs.io.exp import gltf2_io_binary_data
+from io_scene_gltf2_msfs.io.exp import gltf2_io_buffer
+from io_scene_gltf2_msfs.blender.exp.gltf2_blender_gltf2_exporter import GlTF2Exporter
+
+
+def make_scene(node_count, mesh_count):
+    """Build a scene of node_count nodes (chains of 10), sharing mesh_count meshes."""
+    meshes = []
+    for i in range(mesh_count):
+        positions = np.random.rand(24, 3).astype(np.float32)
+        indices = np.arange(36, dtype=np.uint16) % 24
+        primitive = gltf2_io.MeshPrimitive(
+            attributes={'POSITION': __accessor(positions, gltf2_io_constants.DataType.Vec3,
+                                               gltf2_io_constants.ComponentType.Float)},
+            extensions=None,
+            extras=None,
+            indices=__accessor(indices, gltf2_io_constants.DataType.Scalar,
+                               gltf2_io_constants.ComponentType.UnsignedShort),
+            material=None,
+            mode=None,
+            targets=None
+        )
+        meshes.append(gltf2_io.Mesh(extensions=None, extras=None, name='mesh' + str(i),
+                                    primitives=[primitive], weights=None))
+
+    roots = []
+    parent = None
+    for i in range(node_count):
+        node = gltf2_io.Node(
+            camera=None, children=[], extensions=None, extras={'index': i}, matrix=None,
+            mesh=meshes[i % mesh_count], name='node' + str(i), rotation=[0.0, 0.0, 0.0, 1.0],
+            scale=[1.0, 1.0, 1.0], skin=None, translation=[float(i), 0.0, 0.0], weights=None
+        )
+        if i % 10 == 0:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+        parent = node
+
+    return gltf2_io.Scene(extensions=None, extras=None, name='Scene', nodes=roots)
+
+
+def __accessor(array, data_type, component_type):
+    return gltf2_io.Accessor(
+        buffer_view=gltf2_io_binary_data.BinaryData.from_array(array),
+        byte_offset=None,
+        component_type=component_type,
+        count=len(array),
+        extensions=None,
+        extras=None,
+        max=None,
+        min=None,
+        name=None,
+        normalized=None,
+        sparse=None,
+        type=data_type
+    )
+
+
+class ReflectionTraversal:
+    """The former traversal of GlTF2Exporter, kept here as a baseline."""
+
+    def __init__(self):
+        self.buffer = gltf2_io_buffer.Buffer()
+        self.lists = {}
+        # index of each object in its root list, by id, as GlTF2Exporter deduplicates
+        self.indices = {}
+        self.child_of_root = (
+            gltf2_io.Accessor, gltf2_io.Animation, gltf2_io.Buffer, gltf2_io.BufferView, gltf2_io.Camera,
+            gltf2_io.Image, gltf2_io.Material, gltf2_io.Mesh, gltf2_io.Node, gltf2_io.Sampler, gltf2_io.Scene,
+            gltf2_io.Skin, gltf2_io.Texture
+        )
+        self.properties = (
+            gltf2_io.AccessorSparseIndices, gltf2_io.AccessorSparse, gltf2_io.AccessorSparseValues,
+            gltf2_io.AnimationChannel, gltf2_io.AnimationChannelTarget, gltf2_io.AnimationSampler,
+            gltf2_io.Asset, gltf2_io.CameraOrthographic, gltf2_io.CameraPerspective, gltf2_io.MeshPrimitive,
+            gltf2_io.TextureInfo, gltf2_io.MaterialPBRMetallicRoughness,
+            gltf2_io.MaterialNormalTextureInfoClass, gltf2_io.MaterialOcclusionTextureInfoClass
+        )
+
+    def traverse(self, node):
+        def traverse_property(node):
+            for member_name in [a for a in dir(node) if not a.startswith('__') and not callable(getattr(node, a))]:
+                setattr(node, member_name, self.traverse(getattr(node, member_name)))
+            return node
+
+        if type(node) in self.child_of_root:
+            node = traverse_property(node)
+            return self.append_unique_and_get_index(self.lists.setdefault(type(node), []), node)
+        if isinstance(node, list):
+            for i in range(len(node)):
+                node[i] = self.traverse(node[i])
+            return node
+        if isinstance(node, dict):
+            for key in node.keys():
+                node[key] = self.traverse(node[key])
+            return node
+        if type(node) in self.properties:
+            return traverse_property(node)
+        if isinstance(node, gltf2_io_binary_data.BinaryData):
+            buffer_view = self.buffer.add_and_get_view(node)
+            return self.append_unique_and_get_index(self.lists.setdefault(gltf2_io.BufferView, []), buffer_view)
+        return node
+
+    def append_unique_and_get_index(self, target, obj):
+        indices = self.indices.setdefault(id(target), {})
+        index = indices.get(id(obj))
+        if index is None:
+            index = len(target)
+            target.append(obj)
+            indices[id(obj)] = index
+        return index
+
+
+def describe(lists):
+    """
+    Describe the root lists of a traversal by their sizes and what their references point to.
+
+    References are resolved to names and counts, so that traversals appending in another order compare equal.
+    """
+    nodes = lists.get(gltf2_io.Node, [])
+    meshes = lists.get(gltf2_io.Mesh, [])
+    accessors = lists.get(gltf2_io.Accessor, [])
+    buffer_views = lists.get(gltf2_io.BufferView, [])
+
+    def describe_accessor(index):
+        accessor = accessors[index]
+        return accessor.count, buffer_views[accessor.buffer_view].byte_length
+
+    return {
+        'counts': {gltf_type.__name__: len(lists.get(gltf_type, []))
+                   for gltf_type in (gltf2_io.Scene, gltf2_io.Node, gltf2_io.Mesh, gltf2_io.Accessor, gltf2_io.BufferView)},
+        'nodes': sorted(
+            (node.name, meshes[node.mesh].name, tuple(nodes[child].name for child in node.children)) for node in nodes
+        ),
+        'meshes': sorted(
+            (mesh.name, tuple((describe_accessor(primitive.attributes['POSITION']), describe_accessor(primitive.indices))
+                              for primitive in mesh.primitives))
+            for mesh in meshes
+        ),
+        'scenes': [[nodes[index].name for index in scene.nodes] for scene in lists.get(gltf2_io.Scene, [])],
+    }
+
+
+def main(node_count):
+    mesh_count = max(1, node_count // 10)
+    export_settings = {
+        'gltf_copyright': None,
+        'gltf_user_extensions': [],
+    }
+
+    scene = make_scene(node_count, mesh_count)
+    reflection = ReflectionTraversal()
+    start_time = time.perf_counter()
+    reflection.traverse(scene)
+    reflection_time = time.perf_counter() - start_time
+
+    scene = make_scene(node_count, mesh_count)
+    exporter = GlTF2Exporter(export_settings)
+    start_time = time.perf_counter()
+    exporter.add_scene(scene, True)
+    visitor_time = time.perf_counter() - start_time
+
+    print('{} nodes, {} meshes'.format(node_count, mesh_count))
+    print('reflection traversal: {:.3f} s'.format(reflection_time))
+    print('typed visitor:        {:.3f} s'.format(visitor_time))
+
+    gltf = getattr(exporter, '_GlTF2Exporter__gltf')
+    visitor_lists = {
+        gltf2_io.Scene: gltf.scenes,
+        gltf2_io.Node: gltf.nodes,
+        gltf2_io.Mesh: gltf.meshes,
+        gltf2_io.Accessor: gltf.accessors,
+        gltf2_io.BufferView: gltf.buffer_views,
+    }
+    if describe(reflection.lists) != describe(visitor_lists):
+        raise AssertionError('The typed visitor does not build the same root lists as the reflection traversal')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    main(int(argv[0]) if argv else 50000)
@@ -0,0 +1,134 @@
+###################################################################################################
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+###################################################################################################
+#
+#   Benchmark of the keyframes storage of baked animations.
+#   Bakes a synthetic action (500 bones, 1000 frames by default) into location, rotation and scale
+#   keyframes, with the former one object per keyframe storage and with KeyframeTrack.
+#   Reports time, memory and allocation count (tracemalloc) of both.
+#
+#   Run with:
+#       blender --background --python benchmarks/bench_keyframes.py -- [bone_count] [frame_count]
+#
+###################################################################################################
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from io_scene_gltf2_msfs.blender.com import gltf2_blender_math
+from io_scene_gltf2_msfs.blender.exp.gltf2_blender_gather_animation_sampler_keyframes import KeyframeTrack
+
+CHANNELS = ("location", "rotation_quaternion", "scale")
+FPS = 24
+
+
+def make_baked_matrices(bone_count, frame_count, seed=0):
+    """Random (frames, bones, 4, 4) bone matrices, as baked in a BakedBoneMatrices."""
+    rng = np.random.default_rng(seed)
+    rotations = gltf2_blender_math.normalize_quaternions(rng.normal(size=(frame_count * bone_count, 4)))
+    matrices = np.zeros((frame_count * bone_count, 4, 4), dtype=np.float32)
+    matrices[:, :3, :3] = gltf2_blender_math.quaternions_to_matrices(rotations) * rng.uniform(0.5, 2.0, size=(len(rotations), 1, 3))
+    matrices[:, :3, 3] = rng.normal(size=(len(rotations), 3))
+    matrices[:, 3, 3] = 1.0
+    return matrices.reshape(frame_count, bone_count, 4, 4)
+
+
+class PerKeyframe:
+    """The former storage: one object per keyframe, holding lists."""
+
+    def __init__(self, frame, target, length):
+        self.seconds = frame / FPS
+        self.frame = frame
+        self.fps = FPS
+        self.target = target
+        self.__indices = list(range(length))
+        self.__value = None
+        self.__in_tangent = None
+        self.__out_tangent = None
+
+    @property
+    def value(self):
+        return self.__value
+
+    @value.setter
+    def value(self, value):
+        result = [0.0] * len(self.__indices)
+        for i, v in zip(self.__indices, value):
+            result[i] = v
+        self.__value = result
+
+
+def bake_per_keyframe(matrices):
+    frames = [float(frame) for frame in range(matrices.shape[0])]
+    tracks = []
+    for bone in range(matrices.shape[1]):
+        trans, rot, scale = gltf2_blender_math.decompose_matrices(matrices[:, bone])
+        for channel, values in zip(CHANNELS, (trans, rot, scale)):
+            values = values.tolist()
+            keyframes = []
+            for i, frame in enumerate(frames):
+                key = PerKeyframe(frame, channel, len(values[i]))
+                key.value = values[i]
+                keyframes.append(key)
+            tracks.append(keyframes)
+    return tracks
+
+
+def bake_keyframe_tracks(matrices):
+    frames = [float(frame) for frame in range(matrices.shape[0])]
+    tracks = []
+    for bone in range(matrices.shape[1]):
+        trans, rot, scale = gltf2_blender_math.decompose_matrices(matrices[:, bone])
+        for channel, values in zip(CHANNELS, (trans, rot, scale)):
+            track = KeyframeTrack((), frames, FPS, channel)
+            track.set_values(values)
+            tracks.append(track)
+    return tracks
+
+
+def measure(bake, matrices):
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    tracks = bake(matrices)
+    elapsed = time.perf_counter() - start_time
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    statistics = snapshot.statistics('filename')
+    size = sum(stat.size for stat in statistics)
+    count = sum(stat.count for stat in statistics)
+    del tracks
+    return elapsed, size, peak, count
+
+
+def main(bone_count, frame_count):
+    matrices = make_baked_matrices(bone_count, frame_count)
+    print('{} bones, {} frames, {} channels'.format(bone_count, frame_count, bone_count * len(CHANNELS)))
+    for name, bake in (('per keyframe', bake_per_keyframe), ('KeyframeTrack', bake_keyframe_tracks)):
+        elapsed, size, peak, count = measure(bake, matrices)
+        print('{:14} {:7.3f} s, {:8.1f} MB live, {:8.1f} MB peak, {:9d} live blocks'.format(
+            name + ':', elapsed, size / 2 ** 20, peak / 2 ** 20, count))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    main(int(argv[0]) if len(argv) > 0 else 500, int(argv[1]) if len(argv) > 1 else 1000)
@@ -0,0 +1,83 @@
+###################################################################################################
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+###################################################################################################
+#
+#   Benchmark and correctness check of the shape key tangent computation.
+#   Compares the per loop mathutils computation with the vectorized one, on random normals,
+#   including degenerate (unchanged, reversed and null) morphed normals.
+#
+#   Run with:
+#       blender --background --python benchmarks/bench_morph_tangents.py -- [loop_count]
+#
+###################################################################################################
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_extract
+
+TOLERANCE = 1e-5
+
+
+def make_loops(loop_count, seed=0):
+    rng = np.random.default_rng(seed)
+    normals = rng.normal(size=(loop_count, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    morph_normal_deltas = (rng.normal(size=(loop_count, 3)) * 0.3).astype(np.float32)
+    tangents = np.empty((loop_count, 4), dtype=np.float32)
+    tangents[:, :3] = np.cross(normals, rng.normal(size=(loop_count, 3)))
+    tangents[:, :3] /= np.linalg.norm(tangents[:, :3], axis=1, keepdims=True)
+    tangents[:, 3] = 1.0
+
+    # Degenerate cases
+    degenerate_count = min(loop_count // 3, 100)
+    morph_normal_deltas[:degenerate_count] = 0.0
+    morph_normal_deltas[degenerate_count:2 * degenerate_count] = -2.0 * normals[degenerate_count:2 * degenerate_count]
+    morph_normal_deltas[2 * degenerate_count:3 * degenerate_count] = -normals[2 * degenerate_count:3 * degenerate_count]
+
+    return normals, morph_normal_deltas, tangents
+
+
+def main(loop_count):
+    per_loop = getattr(gltf2_blender_extract, '__calc_morph_tangents')
+    vectorized = getattr(gltf2_blender_extract, '__calc_morph_tangents_vectorized')
+
+    normals, morph_normal_deltas, tangents = make_loops(loop_count)
+
+    start_time = time.perf_counter()
+    expected = per_loop(normals, morph_normal_deltas, tangents)
+    per_loop_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    result = vectorized(normals, morph_normal_deltas, tangents)
+    vectorized_time = time.perf_counter() - start_time
+
+    error = float(np.abs(result - expected).max(initial=0.0))
+    print('{} loops'.format(loop_count))
+    print('per loop:   {:.3f} s'.format(per_loop_time))
+    print('vectorized: {:.3f} s'.format(vectorized_time))
+    print('max error:  {:.2e}'.format(error))
+    if error > TOLERANCE:
+        raise AssertionError('Vectorized shape key tangents differ from the per loop ones by {}'.format(error))
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    main(int(argv[0]) if argv else 200000)
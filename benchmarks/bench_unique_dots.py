@@ -0,0 +1,90 @@
+###################################################################################################
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+###################################################################################################
+#
+#   Benchmark and correctness check of the deduplication of dots (loop attributes) in extract_primitives.
+#   Compares np.unique on the structured dots with the hashed deduplication, on wide random dots
+#   (normals, tangents, 2 UV sets, 2 color sets, 2 morph normals) with many duplicates and signed zeros.
+#   Checks that both find the same unique dots, and that the indices rebuild the dots byte for byte.
+#
+#   Run with:
+#       blender --background --python benchmarks/bench_unique_dots.py -- [loop_count]
+#
+###################################################################################################
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from io_scene_gltf2_msfs.blender.exp import gltf2_blender_extract
+
+
+def make_dots(loop_count, seed=0):
+    """Loop dots, each one shared by 4 loops on average, as on a smooth mesh."""
+    fields = [('vertex_index', np.uint32)]
+    fields += [(name, np.float32) for name in ('nx', 'ny', 'nz', 'tx', 'ty', 'tz', 'tw')]
+    fields += [('uv%d%s' % (i, c), np.float32) for i in range(2) for c in 'xy']
+    fields += [('color%d%s' % (i, c), np.float32) for i in range(2) for c in 'rgba']
+    fields += [('morph%dn%s' % (i, c), np.float32) for i in range(2) for c in 'xyz']
+
+    rng = np.random.default_rng(seed)
+    unique_dots = np.empty(max(1, loop_count // 4), dtype=np.dtype(fields))
+    unique_dots['vertex_index'] = rng.integers(0, max(1, loop_count // 8), len(unique_dots))
+    for name, _ in fields[1:]:
+        # few distinct values, with zeros, so that some dots only differ by one field
+        unique_dots[name] = rng.integers(-2, 3, len(unique_dots)).astype(np.float32) * 0.5
+    dots = unique_dots[rng.integers(0, len(unique_dots), loop_count)]
+    # same values, other zero sign
+    dots['nx'][::5] *= -1.0
+    return dots
+
+
+def main(loop_count):
+    unique_dots = getattr(gltf2_blender_extract, '__unique_dots')
+    dots = make_dots(loop_count)
+
+    start_time = time.perf_counter()
+    expected, _ = np.unique(dots.copy(), return_inverse=True)
+    sorted_time = time.perf_counter() - start_time
+
+    hashed_dots = dots.copy()
+    start_time = time.perf_counter()
+    result, indices = unique_dots(hashed_dots)
+    hashed_time = time.perf_counter() - start_time
+
+    print('{} loops, {} bytes per dot, {} unique dots'.format(loop_count, dots.dtype.itemsize, len(result)))
+    print('np.unique: {:.3f} s'.format(sorted_time))
+    print('hashed:    {:.3f} s'.format(hashed_time))
+
+    if not np.array_equal(np.sort(result), expected):
+        raise AssertionError('Hashed deduplication found other unique dots than np.unique')
+    if result[indices].tobytes() != hashed_dots.tobytes():
+        raise AssertionError('Deduplicated dots do not rebuild the input dots')
+    if indices[0] != 0 or np.any(np.diff(np.maximum.accumulate(indices)) > 1):
+        raise AssertionError('Unique dots are not in the order of their first occurrence')
+
+    # meshes without faces have no loop dots
+    result, indices = unique_dots(dots[np.empty(0, dtype=np.uint32)])
+    if len(result) != 0 or len(indices) != 0 or result.dtype != dots.dtype:
+        raise AssertionError('Deduplicating no dots did not return empty arrays')
+
+
+if __name__ == '__main__':
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    main(int(argv[0]) if argv else 1000000)
@@ -72,6 +72,7 @@ from bpy.props import (StringProperty,
                        BoolProperty,
                        EnumProperty,
                        IntProperty,
+                       FloatProperty,
                        CollectionProperty)
 from bpy.types import Operator, AddonPreferences
 from bpy_extras.io_utils import ImportHelper, ExportHelper
@@ -205,6 +206,12 @@ class ExportExtendedGLTF2_Base:
         default=False
     )
 
+    export_parallel_lods: BoolProperty(
+        name='Parallel Lod Write',
+        description='Write the files of a lod in the background while the next lod is gathered',
+        default=False
+    )
+
     export_xml: BoolProperty(
         name='Generate/Append XML file',
         description='Automatically generate an XML file for the model',
@@ -331,6 +338,27 @@ class ExportExtendedGLTF2_Base:
         default=False,
     )
 
+    export_optimize_vertex_cache: BoolProperty(
+        name='Optimize Vertex Cache',
+        description='Reorder triangles for the GPU vertex cache, and vertices in the order they are used. '
+                    'Slows down the export of large meshes',
+        default=False
+    )
+
+    export_mesh_cache: BoolProperty(
+        name='Cache Meshes',
+        description='Keep the extracted meshes in a directory next to the .blend file, '
+                    'to export unchanged meshes faster next time',
+        default=False
+    )
+
+    export_mesh_cache_size: IntProperty(
+        name='Cache Size (MB)',
+        description='Size of the mesh cache, beyond which the least recently used meshes are removed',
+        default=2048,
+        min=64
+    )
+
     export_cameras: BoolProperty(
         name='Cameras',
         description='Export cameras',
@@ -407,6 +435,22 @@ class ExportExtendedGLTF2_Base:
         max=120
     )
 
+    export_bake_cache_size: IntProperty(
+        name='Bake Cache Size',
+        description='Memory budget for baked bone matrices and shape key driver values, in megabytes. '
+                    'Above it, the least recently used actions are baked again when needed',
+        default=512,
+        min=16,
+        max=65536
+    )
+
+    export_parallel_animations: BoolProperty(
+        name='Parallel Animation Output',
+        description='Convert the gathered keyframes to glTF in background threads, one action per thread. '
+                    'Not used when an extension hooks into the gathering of animations',
+        default=False
+    )
+
     export_force_sampling: BoolProperty(
         name='Always Sample Animations',
         description='Apply sampling to all animations',
@@ -429,6 +473,39 @@ class ExportExtendedGLTF2_Base:
         default=False
     )
 
+    export_reduce_keyframes: BoolProperty(
+        name='Reduce Keyframes',
+        description='Remove sampled keyframes that linear interpolation of the other keyframes '
+                    'rebuilds within tolerance',
+        default=False
+    )
+
+    export_reduce_location_tolerance: FloatProperty(
+        name='Location Tolerance',
+        description='Largest distance between a removed keyframe location and the interpolated one',
+        default=0.0001,
+        min=0.0,
+        precision=5,
+        subtype='DISTANCE'
+    )
+
+    export_reduce_rotation_tolerance: FloatProperty(
+        name='Rotation Tolerance',
+        description='Largest angle between a removed keyframe rotation and the interpolated one',
+        default=0.001,
+        min=0.0,
+        precision=3,
+        subtype='ANGLE'
+    )
+
+    export_reduce_scale_tolerance: FloatProperty(
+        name='Scale Tolerance',
+        description='Largest difference between a removed keyframe scale and the interpolated one',
+        default=0.0001,
+        min=0.0,
+        precision=5
+    )
+
     export_current_frame: BoolProperty(
         name='Use Current Frame',
         description='Export the scene in the current animation frame',
@@ -447,6 +524,19 @@ class ExportExtendedGLTF2_Base:
         default=False
     )
 
+    export_weights_format: EnumProperty(
+        name='Weights',
+        items=(('FLOAT', 'Float',
+                'Store bone weights as floats'),
+               ('UNSIGNED_SHORT', 'Normalized Short',
+                'Store bone weights as normalized unsigned shorts. Half the size of floats'),
+               ('UNSIGNED_BYTE', 'Normalized Byte',
+                'Store bone weights as normalized unsigned bytes. A quarter of the size of floats, '
+                'but precision is limited to 1/255')),
+        description='Component type of the bone weights of skinned meshes',
+        default='FLOAT'
+    )
+
     export_morph: BoolProperty(
         name='Shape Keys',
         description='Export shape keys (morph targets)',
@@ -465,6 +555,13 @@ class ExportExtendedGLTF2_Base:
         default=False
     )
 
+    export_morph_tangent_vectorized: BoolProperty(
+        name='Fast Shape Key Tangents',
+        description='Compute shape key tangents for all vertices at once. '
+                    'Disable to use the former, much slower, per vertex computation',
+        default=True
+    )
+
     export_lights: BoolProperty(
         name='Punctual Lights',
         description='Export directional, point, and spot lights. '
@@ -553,6 +650,7 @@ class ExportExtendedGLTF2_Base:
         import datetime
         from .blender.exp import gltf2_blender_export
         from .blender.exp import gltf2_blender_batch_export
+        from .blender.exp.gltf2_blender_image import ExportImageCache
 
         if self.will_save_settings:
             self.save_settings(context)
@@ -571,10 +669,13 @@ class ExportExtendedGLTF2_Base:
             self.export_texture_dir,
         )
         export_settings['gltf_keep_original_textures'] = self.export_keep_originals
+        # encoded images are shared by all lods of this export
+        export_settings['gltf_image_cache'] = ExportImageCache()
 
         #############################################
         # Special MSFS functionality:
         export_settings['gltf_msfs_lods'] = self.export_lods
+        export_settings['gltf_msfs_parallel_lods'] = self.export_lods and self.export_parallel_lods
         export_settings['gltf_msfs_xml'] = self.export_xml
         export_settings['gltf_msfs_xml_file'] = self.export_xml_file
         export_settings['gltf_msfs_generate_guid'] = self.export_xml and self.export_generate_guid
@@ -588,6 +689,11 @@ class ExportExtendedGLTF2_Base:
         export_settings['gltf_tangents'] = self.export_tangents and self.export_normals
         export_settings['gltf_loose_edges'] = self.use_mesh_edges
         export_settings['gltf_loose_points'] = self.use_mesh_vertices
+        export_settings['gltf_optimize_vertex_cache'] = self.export_optimize_vertex_cache
+        export_settings['gltf_mesh_cache'] = self.export_mesh_cache
+        export_settings['gltf_mesh_cache_size'] = self.export_mesh_cache_size
+        # keys of the cached meshes used by this export (and all its lods), kept from eviction
+        export_settings['gltf_mesh_cache_keys'] = set()
 
         if self.is_draco_available:
             export_settings['gltf_draco_mesh_compression'] = self.export_draco_mesh_compression_enable
@@ -630,17 +736,26 @@ class ExportExtendedGLTF2_Base:
             else:
                 export_settings['gltf_def_bones'] = False
             export_settings['gltf_nla_strips'] = self.export_nla_strips
+            export_settings['gltf_reduce_keyframes'] = self.export_reduce_keyframes
+            export_settings['gltf_parallel_animations'] = self.export_parallel_animations
         else:
             export_settings['gltf_frame_range'] = False
             export_settings['gltf_move_keyframes'] = False
             export_settings['gltf_force_sampling'] = False
             export_settings['gltf_def_bones'] = False
+            export_settings['gltf_reduce_keyframes'] = False
+            export_settings['gltf_parallel_animations'] = False
+        export_settings['gltf_reduce_location_tolerance'] = self.export_reduce_location_tolerance
+        export_settings['gltf_reduce_rotation_tolerance'] = self.export_reduce_rotation_tolerance
+        export_settings['gltf_reduce_scale_tolerance'] = self.export_reduce_scale_tolerance
         export_settings['gltf_skins'] = self.export_skins
         if self.export_skins:
             export_settings['gltf_all_vertex_influences'] = self.export_all_influences
         else:
             export_settings['gltf_all_vertex_influences'] = False
+        export_settings['gltf_weights_format'] = self.export_weights_format
         export_settings['gltf_frame_step'] = self.export_frame_step
+        export_settings['gltf_bake_cache_size'] = self.export_bake_cache_size
         export_settings['gltf_morph'] = self.export_morph
         if self.export_morph:
             export_settings['gltf_morph_normal'] = self.export_morph_normal
@@ -650,6 +765,7 @@ class ExportExtendedGLTF2_Base:
             export_settings['gltf_morph_tangent'] = self.export_morph_tangent
         else:
             export_settings['gltf_morph_tangent'] = False
+        export_settings['gltf_morph_tangent_vectorized'] = self.export_morph_tangent_vectorized
 
         export_settings['gltf_lights'] = self.export_lights
         export_settings['gltf_displacement'] = self.export_displacement
@@ -682,6 +798,11 @@ class ExportExtendedGLTF2_Base:
             if hasattr(module, 'glTF2_post_export_callback'):
                 post_export_callbacks.append(module.glTF2_post_export_callback)
         export_settings['gltf_user_extensions'] = user_extensions
+        # sampler outputs are only filled once all animations are gathered in parallel: the animation hooks
+        # would see them empty, extensions that have some get the sequential conversion
+        animation_hooks = ('gather_animation_sampler_hook', 'gather_animation_channel_hook', 'gather_animation_hook')
+        if any(hasattr(extension, hook) for extension in user_extensions for hook in animation_hooks):
+            export_settings['gltf_parallel_animations'] = False
         export_settings['pre_export_callbacks'] = pre_export_callbacks
         export_settings['post_export_callbacks'] = post_export_callbacks
 
@@ -751,6 +872,8 @@ class GLTF_PT_export_special_msfs(bpy.types.Panel):
         col = layout.column(align=True)#heading = "Limit to", align = True)
         #Special functions for MSFS export:
         layout.prop(operator, 'export_lods')
+        if operator.export_lods == True:
+            layout.prop(operator, 'export_parallel_lods')
         layout.prop(operator, 'export_xml')
         if operator.export_xml == True:
             layout.prop(operator, 'export_xml_file', icon='FILE')
@@ -849,6 +972,11 @@ class GLTF_PT_export_geometry_ext_gltf(bpy.types.Panel):
         col = layout.column()
         col.prop(operator, 'use_mesh_edges')
         col.prop(operator, 'use_mesh_vertices')
+        layout.prop(operator, 'export_optimize_vertex_cache')
+        layout.prop(operator, 'export_mesh_cache')
+        col = layout.column()
+        col.active = operator.export_mesh_cache
+        col.prop(operator, 'export_mesh_cache_size')
 
         layout.prop(operator, 'export_materials')
         col = layout.column()
@@ -955,12 +1083,21 @@ class GLTF_PT_export_animation_export_ext_gltf(bpy.types.Panel):
         layout.prop(operator, 'export_frame_range')
         layout.prop(operator, 'export_frame_step')
         layout.prop(operator, 'export_force_sampling')
+        layout.prop(operator, 'export_bake_cache_size')
+        layout.prop(operator, 'export_parallel_animations')
         layout.prop(operator, 'export_nla_strips')
 
         row = layout.row()
         row.active = operator.export_force_sampling
         row.prop(operator, 'export_def_bones')
 
+        layout.prop(operator, 'export_reduce_keyframes')
+        col = layout.column()
+        col.active = operator.export_reduce_keyframes
+        col.prop(operator, 'export_reduce_location_tolerance')
+        col.prop(operator, 'export_reduce_rotation_tolerance')
+        col.prop(operator, 'export_reduce_scale_tolerance')
+
 
 class GLTF_PT_export_animation_shapekeys_ext_gltf(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -995,6 +1132,9 @@ class GLTF_PT_export_animation_shapekeys_ext_gltf(bpy.types.Panel):
         col = layout.column()
         col.active = operator.export_morph_normal
         col.prop(operator, 'export_morph_tangent')
+        col = layout.column()
+        col.active = operator.export_morph_normal and operator.export_morph_tangent
+        col.prop(operator, 'export_morph_tangent_vectorized')
 
 
 class GLTF_PT_export_animation_skinning_ext_gltf(bpy.types.Panel):
@@ -1026,6 +1166,7 @@ class GLTF_PT_export_animation_skinning_ext_gltf(bpy.types.Panel):
 
         layout.active = operator.export_skins
         layout.prop(operator, 'export_all_influences')
+        layout.prop(operator, 'export_weights_format')
 
 class GLTF_PT_export_user_extensions(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -14,6 +14,7 @@
 
 import typing
 import math
+import numpy as np
 from mathutils import Matrix, Vector, Quaternion, Euler
 
 from .gltf2_blender_data_path import get_target_property_name
@@ -161,6 +162,146 @@ def transform_value(value: Vector, _: Matrix = Matrix.Identity(4)) -> Vector:
     return value
 
 
+def decompose_matrices(matrices: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decompose an array of 4x4 matrices like Matrix.decompose.
+
+    Returns the (n, 3) locations, the (n, 4) w-first rotation quaternions (with w >= 0) and the (n, 3) scales.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    locations = matrices[:, :3, 3].copy()
+
+    # Scale is the length of the columns, negated for negative matrices
+    mat3 = matrices[:, :3, :3]
+    scales = np.linalg.norm(mat3, axis=1)
+    scales[np.linalg.det(mat3) < 0.0] *= -1.0
+    rot = np.divide(mat3, scales[:, np.newaxis, :], out=np.zeros_like(mat3), where=scales[:, np.newaxis, :] != 0.0)
+
+    return locations, matrices_to_quaternions(rot), scales
+
+
+def matrices_to_quaternions(rot: np.ndarray) -> np.ndarray:
+    """Convert (n, 3, 3) rotation matrices to (n, 4) w-first quaternions, with w >= 0."""
+    # From the largest component of the quaternion
+    r00, r01, r02 = rot[:, 0, 0], rot[:, 0, 1], rot[:, 0, 2]
+    r10, r11, r12 = rot[:, 1, 0], rot[:, 1, 1], rot[:, 1, 2]
+    r20, r21, r22 = rot[:, 2, 0], rot[:, 2, 1], rot[:, 2, 2]
+    traces = np.stack([
+        1.0 + r00 + r11 + r22,
+        1.0 + r00 - r11 - r22,
+        1.0 - r00 + r11 - r22,
+        1.0 - r00 - r11 + r22,
+    ], axis=1)
+    largest = np.argmax(traces, axis=1)
+    s = 2.0 * np.sqrt(np.maximum(traces[np.arange(len(traces)), largest], np.finfo(np.float64).tiny))
+    rotations = np.select(
+        [(largest == 0)[:, np.newaxis], (largest == 1)[:, np.newaxis], (largest == 2)[:, np.newaxis]],
+        [
+            np.stack([0.25 * s, (r21 - r12) / s, (r02 - r20) / s, (r10 - r01) / s], axis=1),
+            np.stack([(r21 - r12) / s, 0.25 * s, (r01 + r10) / s, (r02 + r20) / s], axis=1),
+            np.stack([(r02 - r20) / s, (r01 + r10) / s, 0.25 * s, (r12 + r21) / s], axis=1),
+        ],
+        np.stack([(r10 - r01) / s, (r02 + r20) / s, (r12 + r21) / s, 0.25 * s], axis=1)
+    )
+    rotations[rotations[:, 0] < 0.0] *= -1.0
+    rotations /= np.linalg.norm(rotations, axis=1, keepdims=True)
+    return rotations
+
+
+def quaternions_to_matrices(rotations: np.ndarray) -> np.ndarray:
+    """Convert (n, 4) w-first quaternions to (n, 3, 3) rotation matrices."""
+    w, x, y, z = rotations[:, 0], rotations[:, 1], rotations[:, 2], rotations[:, 3]
+    return np.stack([
+        np.stack([1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)], axis=1),
+        np.stack([2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)], axis=1),
+        np.stack([2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)], axis=1),
+    ], axis=1)
+
+
+def normalize_quaternions(rotations: np.ndarray) -> np.ndarray:
+    """Normalize (n, 4) quaternions, leaving null ones unchanged."""
+    norms = np.linalg.norm(rotations, axis=1, keepdims=True)
+    return np.divide(rotations, norms, out=np.array(rotations, dtype=np.float64), where=norms != 0.0)
+
+
+def __eulers_to_quaternions(eulers: np.ndarray) -> np.ndarray:
+    """Convert (n, 3) XYZ eulers to (n, 4) w-first quaternions, like Euler.to_quaternion."""
+    half = eulers * 0.5
+    ci, cj, ch = np.cos(half[:, 0]), np.cos(half[:, 1]), np.cos(half[:, 2])
+    si, sj, sh = np.sin(half[:, 0]), np.sin(half[:, 1]), np.sin(half[:, 2])
+    cc, cs, sc, ss = ci * ch, ci * sh, si * ch, si * sh
+    return np.stack([cj * cc + sj * ss, cj * sc - sj * cs, cj * ss + sj * cc, cj * cs - sj * sc], axis=1)
+
+
+def __axis_angles_to_quaternions(axis_angles: np.ndarray) -> np.ndarray:
+    """Convert (n, 4) angle-first axis angles to (n, 4) w-first quaternions, like list_to_mathutils."""
+    # Same as list_to_mathutils, which converts the angle to radians
+    half = np.radians(axis_angles[:, 0]) * 0.5
+    axis = axis_angles[:, 1:]
+    norms = np.linalg.norm(axis, axis=1, keepdims=True)
+    axis = np.divide(axis, norms, out=np.zeros_like(axis), where=norms != 0.0)
+    rotations = np.concatenate([np.cos(half)[:, np.newaxis], axis * np.sin(half)[:, np.newaxis]], axis=1)
+    rotations[norms[:, 0] == 0.0] = (1.0, 0.0, 0.0, 0.0)
+    return rotations
+
+
+def lists_to_array(values: np.ndarray, data_path: str) -> np.ndarray:
+    """Convert (n, k) Blender property values to arrays, with rotations as w-first quaternions, like list_to_mathutils."""
+    target = get_target_property_name(data_path)
+    values = np.asarray(values, dtype=np.float64)
+
+    if target in ('delta_rotation_euler', 'rotation_euler'):
+        return __eulers_to_quaternions(values)
+    elif target == 'rotation_axis_angle':
+        return __axis_angles_to_quaternions(values)
+
+    return values
+
+
+def transform_array(values: np.ndarray, data_path: str, transform: Matrix = Matrix.Identity(4)) -> np.ndarray:
+    """Transform (n, k) values like transform, w-first quaternions for rotations."""
+    target = get_target_property_name(data_path)
+    matrix = np.array(transform, dtype=np.float64)
+    mat3 = matrix[:3, :3]
+
+    if target in ('delta_location', 'location'):
+        return values @ mat3.T + matrix[:3, 3]
+    elif target in ('delta_rotation_euler', 'rotation_axis_angle', 'rotation_euler', 'rotation_quaternion'):
+        rotations = mat3 @ quaternions_to_matrices(normalize_quaternions(values))
+        norms = np.linalg.norm(rotations, axis=1, keepdims=True)
+        rotations = np.divide(rotations, norms, out=np.zeros_like(rotations), where=norms != 0.0)
+        return matrices_to_quaternions(rotations)
+    elif target == 'scale':
+        return np.abs(values) * np.linalg.norm(mat3, axis=0)
+    elif target == 'value':
+        return values
+
+    raise RuntimeError("Cannot transform values at {}".format(data_path))
+
+
+def swizzle_yup_array(values: np.ndarray, data_path: str) -> np.ndarray:
+    """Manage Yup, on (n, k) values, w-first quaternions for rotations."""
+    target = get_target_property_name(data_path)
+
+    if target in ('delta_location', 'location'):
+        return np.stack([values[:, 0], values[:, 2], -values[:, 1]], axis=1)
+    elif target in ('delta_rotation_euler', 'rotation_axis_angle', 'rotation_euler', 'rotation_quaternion'):
+        return np.stack([values[:, 0], values[:, 1], values[:, 3], -values[:, 2]], axis=1)
+    elif target == 'scale':
+        return values[:, [0, 2, 1]]
+    elif target == 'value':
+        return values
+
+    raise RuntimeError("Cannot transform values at {}".format(data_path))
+
+
+def array_to_gltf(values: np.ndarray, data_path: str) -> np.ndarray:
+    """Reorder (n, k) values to glTF: quaternions are w-last in glTF."""
+    if get_target_property_name(data_path) in ('delta_rotation_euler', 'rotation_axis_angle', 'rotation_euler', 'rotation_quaternion'):
+        return values[:, [1, 2, 3, 0]]
+    return values
+
+
 def round_if_near(value: float, target: float) -> float:
     """If value is very close to target, round to target."""
     return value if abs(value - target) > 2.0e-6 else target
@@ -0,0 +1,269 @@
+# Copyright 2018-2021 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import bpy
+import os
+import typing
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from ...io.com.gltf2_io_debug import print_console
+from .gltf2_blender_gather_cache import BakedBoneMatrices, BakedDriverValues, BakeCache
+from .gltf2_blender_gather_drivers import get_sk_drivers, evaluate_sk_driver_values
+
+
+def get_pose_bone_matrix(blender_object_if_armature: bpy.types.Object, pbone: bpy.types.PoseBone):
+    """Get the matrix of the pose bone, relative to its parent, as exported in glTF."""
+    if (pbone.bone.use_inherit_rotation == False or pbone.bone.inherit_scale != "FULL") and pbone.parent != None:
+        rest_mat = (pbone.parent.bone.matrix_local.inverted_safe() @ pbone.bone.matrix_local)
+        return rest_mat.inverted_safe() @ pbone.parent.matrix.inverted_safe() @ pbone.matrix
+
+    return blender_object_if_armature.convert_space(pose_bone=pbone, matrix=pbone.matrix, from_space='POSE', to_space='LOCAL')
+
+
+def get_frames(frame_start, frame_end, step) -> typing.List[float]:
+    """Get the frames sampled over a frame range."""
+    frames = []
+    frame = frame_start
+    while frame <= frame_end:
+        frames.append(frame)
+        frame += step
+    return frames
+
+
+def get_bone_matrices(blender_object_if_armature: bpy.types.Object,
+                      bone_name: str,
+                      action_name: str,
+                      frames: typing.Sequence[float],
+                      local: bool,
+                      bake_frames: typing.Sequence[float],
+                      store: 'BakeStore') -> np.ndarray:
+    """
+    Get the (len(frames), 4, 4) matrices of a bone for the active action, baking them if needed.
+
+    :param local: True for the matrices relative to the parent bone, False for the matrix_basis
+    :param bake_frames: the frames to bake along, if the action must be baked
+    """
+    baked = store.get_bone_matrices(blender_object_if_armature.name, action_name, local)
+    if baked is None or not baked.has_frames(frames):
+        baked = __bake_bone_matrices(blender_object_if_armature, action_name, sorted(set(bake_frames) | set(frames)), local, store)
+    return baked.get_bone(bone_name, frames)
+
+
+def get_sk_driver_values(blender_object_if_armature: bpy.types.Object,
+                         driver_obj: bpy.types.Object,
+                         fcurves: typing.Tuple[bpy.types.FCurve],
+                         action_name: str,
+                         frames: typing.Sequence[float],
+                         bake_frames: typing.Sequence[float],
+                         store: 'BakeStore') -> np.ndarray:
+    """
+    Get the (len(frames), shape keys) values of the shape keys driven by the armature, for the active action.
+
+    They are baked along the bones. If they were evicted since, only the driver values are baked again.
+    """
+    baked = store.get_sk_driver_values(blender_object_if_armature.name, action_name, driver_obj.name)
+    if baked is None or not baked.has_frames(frames):
+        frames_to_bake = sorted(set(bake_frames) | set(frames))
+        baked = BakedDriverValues(frames_to_bake, len([f for f in fcurves if f is not None]))
+        for frame in frames_to_bake:
+            bpy.context.scene.frame_set(int(frame))
+            baked.set_frame(frame, evaluate_sk_driver_values(driver_obj, fcurves))
+        store.add_sk_driver_values(blender_object_if_armature.name, action_name, driver_obj.name, baked)
+    return baked.get(frames)
+
+
+def __bake_bone_matrices(blender_object_if_armature: bpy.types.Object,
+                         action_name: str,
+                         frames: typing.Sequence[float],
+                         local: bool,
+                         store: 'BakeStore') -> BakedBoneMatrices:
+    pose_bones = blender_object_if_armature.pose.bones
+    baked = BakedBoneMatrices(frames, [pbone.name for pbone in pose_bones])
+    # If some drivers must be evaluated, do it here, to avoid to have to change frame by frame later
+    baked_drivers = [(dr_obj, dr_fcurves, BakedDriverValues(frames, len([f for f in dr_fcurves if f is not None])))
+                     for dr_obj, dr_fcurves in get_sk_drivers(blender_object_if_armature)]
+
+    for frame in frames:
+        # we need to bake in the constraints
+        bpy.context.scene.frame_set(int(frame))
+        if local:
+            baked.set_frame(frame, [get_pose_bone_matrix(blender_object_if_armature, pbone) for pbone in pose_bones])
+        else:
+            baked.set_frame(frame, [pbone.matrix_basis for pbone in pose_bones])
+        for dr_obj, dr_fcurves, driver_values in baked_drivers:
+            driver_values.set_frame(frame, evaluate_sk_driver_values(dr_obj, dr_fcurves))
+
+    store.add_bone_matrices(blender_object_if_armature.name, action_name, local, baked)
+    for dr_obj, _, driver_values in baked_drivers:
+        store.add_sk_driver_values(blender_object_if_armature.name, action_name, dr_obj.name, driver_values)
+    return baked
+
+
+class BakeStore:
+    """
+    Bone matrices and shape key driver values baked during an export, within a memory budget.
+
+    Bone matrices are kept by armature, action and space. Shape key driver values are kept by armature,
+    action and driven object. The store is created empty when the animations of an export are gathered,
+    and cleared once they are.
+    """
+
+    def __init__(self, budget: int):
+        self.__cache = BakeCache(budget)
+
+    def get_bone_matrices(self, armature_name: str, action_name: str, local: bool) -> typing.Optional[BakedBoneMatrices]:
+        return self.__cache.get(('BONES', armature_name, action_name, local))
+
+    def add_bone_matrices(self, armature_name: str, action_name: str, local: bool, baked: BakedBoneMatrices):
+        self.__cache.put(('BONES', armature_name, action_name, local), baked)
+
+    def get_sk_driver_values(self, armature_name: str, action_name: str, driver_object_name: str) -> typing.Optional[BakedDriverValues]:
+        return self.__cache.get(('SK_DRIVERS', armature_name, action_name, driver_object_name))
+
+    def add_sk_driver_values(self, armature_name: str, action_name: str, driver_object_name: str, baked: BakedDriverValues):
+        self.__cache.put(('SK_DRIVERS', armature_name, action_name, driver_object_name), baked)
+
+    def clear(self):
+        self.__cache.clear()
+
+    @property
+    def nbytes(self) -> int:
+        return self.__cache.nbytes
+
+
+class BakeScheduler:
+    """
+    Bake the bones of many armatures and actions in a single pass over the timeline.
+
+    Every frame_set re-evaluates the whole scene. Instead of stepping the timeline over each action of each
+    armature, all the actions to bake are collected up front. One action per armature is then assigned at a
+    time, and the timeline is stepped once over the union of their frame ranges, sampling all of them at each
+    frame. The number of passes is the largest number of actions of a single armature.
+    """
+
+    def __init__(self, export_settings):
+        self.__export_settings = export_settings
+        self.__requests = {}
+
+    def add(self, blender_object: bpy.types.Object, blender_action: bpy.types.Action, frame_start, frame_end):
+        """Request the baking of the bones of the armature with the action, over the frame range."""
+        self.__requests.setdefault(blender_object, []).append((blender_action, frame_start, frame_end))
+
+    def run(self, store: BakeStore) -> BakeStore:
+        pass_count = max([len(requests) for requests in self.__requests.values()], default=0)
+        for pass_index in range(pass_count):
+            self.__run_pass(
+                [(blender_object, requests[pass_index])
+                 for blender_object, requests in self.__requests.items() if pass_index < len(requests)],
+                store
+            )
+        return store
+
+    def __run_pass(self, requests, store: BakeStore):
+        step = self.__export_settings['gltf_frame_step']
+        states = []
+        baked_actions = []
+        samples_by_frame = {}
+        try:
+            for blender_object, (blender_action, frame_start, frame_end) in requests:
+                state = self.__set_action(blender_object, blender_action)
+                if state is None:
+                    continue
+                states.append((blender_object, state))
+
+                frames = get_frames(frame_start, frame_end, step)
+                baked = BakedBoneMatrices(frames, [pbone.name for pbone in blender_object.pose.bones])
+                baked_drivers = [(dr_obj, dr_fcurves, BakedDriverValues(frames, len([f for f in dr_fcurves if f is not None])))
+                                 for dr_obj, dr_fcurves in get_sk_drivers(blender_object)]
+                baked_actions.append((blender_object.name, blender_action.name, baked, baked_drivers))
+                for frame in frames:
+                    samples_by_frame.setdefault(int(frame), []).append((blender_object, frame, baked, baked_drivers))
+
+            for scene_frame in sorted(samples_by_frame.keys()):
+                bpy.context.scene.frame_set(scene_frame)
+                for blender_object, frame, baked, baked_drivers in samples_by_frame[scene_frame]:
+                    baked.set_frame(frame, [get_pose_bone_matrix(blender_object, pbone) for pbone in blender_object.pose.bones])
+                    for dr_obj, dr_fcurves, driver_values in baked_drivers:
+                        driver_values.set_frame(frame, evaluate_sk_driver_values(dr_obj, dr_fcurves))
+
+            for armature_name, action_name, baked, baked_drivers in baked_actions:
+                store.add_bone_matrices(armature_name, action_name, True, baked)
+                for dr_obj, _, driver_values in baked_drivers:
+                    store.add_sk_driver_values(armature_name, action_name, dr_obj.name, driver_values)
+        finally:
+            for blender_object, state in states:
+                self.__restore_action(blender_object, state)
+
+    @staticmethod
+    def __set_action(blender_object: bpy.types.Object, blender_action: bpy.types.Action):
+        """Set the action as active, muting any solo NLA track. Returns the state to restore, or None on failure."""
+        current_action = blender_object.animation_data.action
+        if current_action is None or current_action.name != blender_action.name:
+            try:
+                if blender_object.animation_data.is_property_readonly('action'):
+                    raise AttributeError()
+                blender_object.animation_data.action = blender_action
+            except:
+                # Will be reported when gathering the animation
+                print_console("DEBUG", "Action {} of {} can't be baked ahead".format(blender_action.name, blender_object.name))
+                return None
+
+        solo_track = None
+        for track in blender_object.animation_data.nla_tracks:
+            if track.is_solo:
+                solo_track = track
+                track.is_solo = False
+                break
+
+        return current_action, solo_track
+
+    @staticmethod
+    def __restore_action(blender_object: bpy.types.Object, state):
+        current_action, solo_track = state
+        blender_object.animation_data.action = current_action
+        if solo_track is not None:
+            solo_track.is_solo = True
+
+
+class SamplerOutputJobs:
+    """
+    Sampler outputs of an export, computed from keyframe arrays once all animations are gathered.
+
+    Gathering keyframes reads the scene, and stays on the main thread. Converting them to glTF (transforms,
+    quaternion continuity, packing into a buffer) only works on arrays snapshotted from the scene: these jobs
+    are queued by action, and the actions are run in a thread pool. Each job only fills its own accessor, so
+    the output doesn't depend on the order the jobs complete in.
+    """
+
+    def __init__(self):
+        self.__jobs = {}
+
+    def add(self, action_name: str, job: typing.Callable[[], None]):
+        self.__jobs.setdefault(action_name, []).append(job)
+
+    def run(self):
+        if len(self.__jobs) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as executor:
+            futures = [executor.submit(self.__run_action, jobs) for jobs in self.__jobs.values()]
+            # this re-raises any error that occurred in a worker
+            for future in futures:
+                future.result()
+        self.__jobs = {}
+
+    @staticmethod
+    def __run_action(jobs: typing.List[typing.Callable[[], None]]):
+        for job in jobs:
+            job()
@@ -26,11 +26,15 @@ import bpy
 import time
 import re
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from ...io.com.gltf2_io_debug import print_console, print_newline
 from .gltf2_blender_gltf2_exporter import GlTF2Exporter
 from ...io.exp import gltf2_io_draco_compression_extension
 from ...io.exp.gltf2_io_user_extensions import export_user_extensions
 
+__texture_write_lock = threading.Lock()
+
 def save_ext_gltf(context, export_settings):
     """Go through the collections and find the lods, export them one by one."""
     
@@ -42,44 +46,80 @@ def save_ext_gltf(context, export_settings):
     filename_base, extension = os.path.splitext(export_settings['gltf_filepath'])
     filename, extension = os.path.splitext(os.path.basename(export_settings['gltf_filepath']))
 
-    lod_model_export_settings = export_settings.copy()
-    
-    for collection in bpy.data.collections:
-        if pattern.match(collection.name):
-            #save collection name in export settings:
-            lod_model_export_settings['gltf_current_collection'] = collection.name
-
-            lod_id = str(rpattern.subn('_LOD', collection.name)[0])
-            lod_filename = filename_base+lod_id+extension
-            lods.append(lod_filename)
-
-            lod_model_export_settings['gltf_filepath'] = lod_filename
-            lod_model_export_settings['gltf_binaryfilename'] = filename+lod_id+'.bin'
-
-            
-            # Begin export process:
-            original_frame = bpy.context.scene.frame_current
-            if not lod_model_export_settings['gltf_current_frame']:
-                bpy.context.scene.frame_set(0)
-
-            gltf2_blender_export.__notify_start_ext_gltf(context)
-            start_time = time.time()
-            pre_export_callbacks = lod_model_export_settings["pre_export_callbacks"]
-            for callback in pre_export_callbacks:
-                callback(lod_model_export_settings)
-
-            json, buffer = __export_ext_gltf(lod_model_export_settings)
+    # In parallel mode the gather of a lod stays on the main thread (it needs bpy), while
+    # buffer finalization, JSON encoding and file writes of the previous lod run in a worker.
+    executor = None
+    if export_settings['gltf_msfs_parallel_lods']:
+        executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    pending = []
+
+    try:
+        for collection in bpy.data.collections:
+            if pattern.match(collection.name):
+                # every lod gets its own settings, as workers may still read them while the next lod is gathered
+                lod_model_export_settings = export_settings.copy()
+
+                #save collection name in export settings:
+                lod_model_export_settings['gltf_current_collection'] = collection.name
+
+                lod_id = str(rpattern.subn('_LOD', collection.name)[0])
+                lod_filename = filename_base+lod_id+extension
+                lods.append(lod_filename)
+
+                lod_model_export_settings['gltf_filepath'] = lod_filename
+                lod_model_export_settings['gltf_binaryfilename'] = filename+lod_id+'.bin'
+
+                
+                # Begin export process:
+                original_frame = bpy.context.scene.frame_current
+                if not lod_model_export_settings['gltf_current_frame']:
+                    bpy.context.scene.frame_set(0)
+
+                gltf2_blender_export.__notify_start_ext_gltf(context)
+                start_time = time.time()
+                pre_export_callbacks = lod_model_export_settings["pre_export_callbacks"]
+                for callback in pre_export_callbacks:
+                    callback(lod_model_export_settings)
+
+                exporter = __gather_exporter_ext_gltf(lod_model_export_settings)
+                gather_time = time.time() - start_time
+
+                if executor is None:
+                    json, buffer = __finalize_ext_gltf(exporter, lod_model_export_settings)
+
+                    post_export_callbacks = lod_model_export_settings["post_export_callbacks"]
+                    for callback in post_export_callbacks:
+                        callback(lod_model_export_settings)
+
+                    gltf2_blender_export.__write_file_ext_gltf(json, buffer, lod_model_export_settings)
+
+                    end_time = time.time()
+                    gltf2_blender_export.__notify_end_ext_gltf(context, end_time - start_time)
+                else:
+                    # the post export callbacks and the end notification wait for the lod to be written
+                    pending.append((lod_filename, lod_model_export_settings, start_time, gather_time,
+                                    executor.submit(__write_lod_ext_gltf, exporter, lod_model_export_settings)))
+
+                if not lod_model_export_settings['gltf_current_frame']:
+                    bpy.context.scene.frame_set(original_frame)
+
+        # wait for the remaining writes, this re-raises any error that occurred in a worker
+        for lod_filename, lod_model_export_settings, start_time, gather_time, future in pending:
+            write_time = future.result()
+            print_console('INFO', 'LOD <{}>: gathered in {:.3f} s, written in {:.3f} s'.format(
+                lod_filename, gather_time, write_time))
 
             post_export_callbacks = lod_model_export_settings["post_export_callbacks"]
             for callback in post_export_callbacks:
                 callback(lod_model_export_settings)
-            gltf2_blender_export.__write_file_ext_gltf(json, buffer, lod_model_export_settings)
 
             end_time = time.time()
             gltf2_blender_export.__notify_end_ext_gltf(context, end_time - start_time)
-
-            if not lod_model_export_settings['gltf_current_frame']:
-                bpy.context.scene.frame_set(original_frame)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+        # all lods are done, release the encoded images
+        export_settings['gltf_image_cache'].clear()
             
     #save XML file if required:
     if export_settings['gltf_msfs_xml'] == True:
@@ -104,17 +144,33 @@ def save_ext_gltf(context, export_settings):
         return{'CANCELLED'}
 
 
-def __export_ext_gltf(export_settings):
-    from . import gltf2_blender_export
-
+def __gather_exporter_ext_gltf(export_settings):
+    """Gather the scene into a new exporter. Needs bpy, so this has to run on the main thread."""
     exporter = GlTF2Exporter(export_settings)
     __gather_ext_gltf(exporter, export_settings)
+    return exporter
+
+def __finalize_ext_gltf(exporter, export_settings):
+    """Finalize buffer and images, and build the JSON. Does not access bpy data."""
+    from . import gltf2_blender_export
+
     buffer = gltf2_blender_export.__create_buffer_ext_gltf(exporter, export_settings)
-    exporter.finalize_images()
+    with __texture_write_lock:
+        # lods share their textures, so never write the same file from two workers at once
+        exporter.finalize_images()
     json = gltf2_blender_export.__fix_json_ext_gltf(exporter.glTF.to_dict())
 
     return json, buffer
 
+def __write_lod_ext_gltf(exporter, export_settings):
+    """Worker task of the parallel lod export. Returns the time spent, in seconds."""
+    from . import gltf2_blender_export
+
+    start_time = time.time()
+    json, buffer = __finalize_ext_gltf(exporter, export_settings)
+    gltf2_blender_export.__write_file_ext_gltf(json, buffer, export_settings)
+    return time.time() - start_time
+
 def __gather_ext_gltf(exporter, export_settings):
     from . import gltf2_blender_batch_gather
     active_scene_idx, scenes, animations = gltf2_blender_batch_gather.gather_gltf2(export_settings)
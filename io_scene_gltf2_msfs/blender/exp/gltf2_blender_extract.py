@@ -46,31 +46,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
     if export_settings[gltf2_blender_export_keys.COLORS]:
         color_max = len(blender_mesh.vertex_colors)
 
-    armature = None
-    skin = None
-    if blender_vertex_groups and export_settings[gltf2_blender_export_keys.SKINS]:
-        if modifiers is not None:
-            modifiers_dict = {m.type: m for m in modifiers}
-            if "ARMATURE" in modifiers_dict:
-                modifier = modifiers_dict["ARMATURE"]
-                armature = modifier.object
-
-        # Skin must be ignored if the object is parented to a bone of the armature
-        # (This creates an infinite recursive error)
-        # So ignoring skin in that case
-        is_child_of_arma = (
-            armature and
-            blender_object and
-            blender_object.parent_type == "BONE" and
-            blender_object.parent.name == armature.name
-        )
-        if is_child_of_arma:
-            armature = None
-
-        if armature:
-            skin = gltf2_blender_gather_skins.gather_skin(armature, export_settings)
-            if not skin:
-                armature = None
+    armature, skin = get_armature_and_skin(blender_object, blender_vertex_groups, modifiers, export_settings)
 
     use_morph_normals = use_normals and export_settings[gltf2_blender_export_keys.MORPH_NORMAL]
     use_morph_tangents = use_morph_normals and use_tangents and export_settings[gltf2_blender_export_keys.MORPH_TANGENT]
@@ -89,7 +65,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
 
     locs, morph_locs = __get_positions(blender_mesh, key_blocks, armature, blender_object, export_settings)
     if skin:
-        vert_bones, num_joint_sets = __get_bone_data(blender_mesh, skin, blender_vertex_groups)
+        vert_joints, vert_weights, num_joint_sets = __get_bone_data(blender_mesh, skin, blender_vertex_groups)
 
     # In Blender there is both per-vert data, like position, and also per-loop
     # (loop=corner-of-poly) data, like normals or UVs. glTF only has per-vert
@@ -188,12 +164,17 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
 
         tri_material_idxs = np.empty(len(blender_mesh.loop_triangles), dtype=np.uint32)
         blender_mesh.loop_triangles.foreach_get('material_index', tri_material_idxs)
-        loop_material_idxs = np.repeat(tri_material_idxs, 3)  # material index for every loop
-        unique_material_idxs = np.unique(tri_material_idxs)
+
+        # Sort the triangles by material once, keeping their order within a material, then split at the boundaries
+        tri_order = np.argsort(tri_material_idxs, kind='stable')
+        sorted_material_idxs = tri_material_idxs[tri_order]
+        starts = np.flatnonzero(np.diff(sorted_material_idxs)) + 1
+        tri_loop_indices = loop_indices.reshape(-1, 3)
         del tri_material_idxs
 
-        for material_idx in unique_material_idxs:
-            prim_indices[material_idx] = loop_indices[loop_material_idxs == material_idx]
+        if len(tri_order) != 0:
+            for material_idx, tris in zip(sorted_material_idxs[np.concatenate([[0], starts])], np.split(tri_order, starts)):
+                prim_indices[material_idx] = tri_loop_indices[tris].reshape(-1)
 
     # Create all the primitives.
 
@@ -203,7 +184,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
         # Extract just dots used by this primitive, deduplicate them, and
         # calculate indices into this deduplicated list.
         prim_dots = dots[dot_indices]
-        prim_dots, indices = np.unique(prim_dots, return_inverse=True)
+        prim_dots, indices = __unique_dots(prim_dots)
 
         if len(prim_dots) == 0:
             continue
@@ -243,7 +224,10 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
                 attributes['MORPH_NORMAL_%d' % morph_i] = ns
 
                 if use_morph_tangents:
-                    attributes['MORPH_TANGENT_%d' % morph_i] = __calc_morph_tangents(normals, ns, tangents)
+                    if export_settings['gltf_morph_tangent_vectorized']:
+                        attributes['MORPH_TANGENT_%d' % morph_i] = __calc_morph_tangents_vectorized(normals, ns, tangents)
+                    else:
+                        attributes['MORPH_TANGENT_%d' % morph_i] = __calc_morph_tangents(normals, ns, tangents)
 
         for tex_coord_i in range(tex_coord_max):
             uvs = np.empty((len(prim_dots), 2), dtype=np.float32)
@@ -260,22 +244,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
             attributes['COLOR_%d' % color_i] = colors
 
         if skin:
-            joints = [[] for _ in range(num_joint_sets)]
-            weights = [[] for _ in range(num_joint_sets)]
-
-            for vi in blender_idxs:
-                bones = vert_bones[vi]
-                for j in range(0, 4 * num_joint_sets):
-                    if j < len(bones):
-                        joint, weight = bones[j]
-                    else:
-                        joint, weight = 0, 0.0
-                    joints[j//4].append(joint)
-                    weights[j//4].append(weight)
-
-            for i, (js, ws) in enumerate(zip(joints, weights)):
-                attributes['JOINTS_%d' % i] = js
-                attributes['WEIGHTS_%d' % i] = ws
+            attributes.update(__get_skin_attributes(blender_idxs, vert_joints, vert_weights, num_joint_sets))
 
         primitives.append({
             'attributes': attributes,
@@ -283,14 +252,17 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
             'material': material_idx,
         })
 
+    if export_settings['gltf_loose_edges'] or export_settings['gltf_loose_points']:
+        edge_vidxs = __get_edge_vertex_indices(blender_mesh)
+
     if export_settings['gltf_loose_edges']:
         # Find loose edges
-        loose_edges = [e for e in blender_mesh.edges if e.is_loose]
-        blender_idxs = [vi for e in loose_edges for vi in e.vertices]
+        edge_is_loose = np.empty(len(blender_mesh.edges), dtype=bool)
+        blender_mesh.edges.foreach_get('is_loose', edge_is_loose)
+        blender_idxs = edge_vidxs[edge_is_loose].reshape(-1)
 
-        if blender_idxs:
+        if len(blender_idxs) != 0:
             # Export one glTF vert per unique Blender vert in a loose edge
-            blender_idxs = np.array(blender_idxs, dtype=np.uint32)
             blender_idxs, indices = np.unique(blender_idxs, return_inverse=True)
 
             attributes = {}
@@ -301,22 +273,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
                 attributes['MORPH_POSITION_%d' % morph_i] = vs[blender_idxs]
 
             if skin:
-                joints = [[] for _ in range(num_joint_sets)]
-                weights = [[] for _ in range(num_joint_sets)]
-
-                for vi in blender_idxs:
-                    bones = vert_bones[vi]
-                    for j in range(0, 4 * num_joint_sets):
-                        if j < len(bones):
-                            joint, weight = bones[j]
-                        else:
-                            joint, weight = 0, 0.0
-                        joints[j//4].append(joint)
-                        weights[j//4].append(weight)
-
-                for i, (js, ws) in enumerate(zip(joints, weights)):
-                    attributes['JOINTS_%d' % i] = js
-                    attributes['WEIGHTS_%d' % i] = ws
+                attributes.update(__get_skin_attributes(blender_idxs, vert_joints, vert_weights, num_joint_sets))
 
             primitives.append({
                 'attributes': attributes,
@@ -327,15 +284,10 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
 
     if export_settings['gltf_loose_points']:
         # Find loose points
-        verts_in_edge = set(vi for e in blender_mesh.edges for vi in e.vertices)
-        blender_idxs = [
-            vi for vi, _ in enumerate(blender_mesh.vertices)
-            if vi not in verts_in_edge
-        ]
-
-        if blender_idxs:
-            blender_idxs = np.array(blender_idxs, dtype=np.uint32)
+        vert_edge_counts = np.bincount(edge_vidxs.reshape(-1), minlength=len(blender_mesh.vertices))
+        blender_idxs = np.flatnonzero(vert_edge_counts == 0).astype(np.uint32)
 
+        if len(blender_idxs) != 0:
             attributes = {}
 
             attributes['POSITION'] = locs[blender_idxs]
@@ -344,22 +296,7 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
                 attributes['MORPH_POSITION_%d' % morph_i] = vs[blender_idxs]
 
             if skin:
-                joints = [[] for _ in range(num_joint_sets)]
-                weights = [[] for _ in range(num_joint_sets)]
-
-                for vi in blender_idxs:
-                    bones = vert_bones[vi]
-                    for j in range(0, 4 * num_joint_sets):
-                        if j < len(bones):
-                            joint, weight = bones[j]
-                        else:
-                            joint, weight = 0, 0.0
-                        joints[j//4].append(joint)
-                        weights[j//4].append(weight)
-
-                for i, (js, ws) in enumerate(zip(joints, weights)):
-                    attributes['JOINTS_%d' % i] = js
-                    attributes['WEIGHTS_%d' % i] = ws
+                attributes.update(__get_skin_attributes(blender_idxs, vert_joints, vert_weights, num_joint_sets))
 
             primitives.append({
                 'attributes': attributes,
@@ -372,6 +309,92 @@ def extract_primitives(glTF, blender_mesh, library, blender_object, blender_vert
     return primitives
 
 
+def get_armature_and_skin(blender_object, blender_vertex_groups, modifiers, export_settings):
+    """Get the armature deforming the mesh and its skin, if the mesh is exported skinned. Else (None, None)."""
+    armature = None
+    skin = None
+    if blender_vertex_groups and export_settings[gltf2_blender_export_keys.SKINS]:
+        if modifiers is not None:
+            modifiers_dict = {m.type: m for m in modifiers}
+            if "ARMATURE" in modifiers_dict:
+                modifier = modifiers_dict["ARMATURE"]
+                armature = modifier.object
+
+        # Skin must be ignored if the object is parented to a bone of the armature
+        # (This creates an infinite recursive error)
+        # So ignoring skin in that case
+        is_child_of_arma = (
+            armature and
+            blender_object and
+            blender_object.parent_type == "BONE" and
+            blender_object.parent.name == armature.name
+        )
+        if is_child_of_arma:
+            armature = None
+
+        if armature:
+            skin = gltf2_blender_gather_skins.gather_skin(armature, export_settings)
+            if not skin:
+                armature = None
+
+    return armature, skin
+
+
+def __unique_dots(dots):
+    """
+    Deduplicate dots, in the order of their first occurrence. Returns the unique dots, and the index of each dot
+    in them.
+
+    Sorting a structured array compares it field by field, which is slow for wide dots. Instead, each dot is
+    hashed from its bytes, and only the hashes are sorted. Dots with the same hash are checked to be the same,
+    falling back to sorting the dots as bytes on a collision.
+    """
+    if len(dots) == 0:
+        # No faces (only loose edges or points), the words can't be reshaped per dot
+        return dots, np.empty(0, dtype=np.int64)
+
+    # -0.0 and 0.0 have different bytes but are the same value: make them all 0.0, as comparing values would
+    for name in dots.dtype.names:
+        if dots.dtype[name].kind == 'f':
+            dots[name] += 0.0
+
+    # All fields are 4 bytes wide
+    words = np.ascontiguousarray(dots).view(np.uint32).reshape(len(dots), -1)
+    hashes = __hash_rows(words)
+    _, first_idxs, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    representatives = first_idxs[inverse]
+    if not all(np.array_equal(words[:, i], words[representatives, i]) for i in range(words.shape[1])):
+        keys = words.view(np.dtype((np.void, words.shape[1] * 4))).reshape(-1)
+        _, first_idxs, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+    # Number the unique dots in the order they first occur
+    order = np.argsort(first_idxs, kind='stable')
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    return dots[first_idxs[order]], ranks[inverse]
+
+
+def __hash_rows(words):
+    """Get a 64 bit hash of each row of a (n, k) uint32 array."""
+    hashes = np.full(len(words), 0xcbf29ce484222325, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for i in range(words.shape[1]):
+            hashes ^= words[:, i].astype(np.uint64)
+            hashes *= np.uint64(0x100000001b3)
+            hashes ^= hashes >> np.uint64(29)
+    return hashes
+
+
+def __get_edge_vertex_indices(blender_mesh):
+    """Get an array of the two vertex indices of each edge."""
+    edge_vidxs = np.empty(len(blender_mesh.edges) * 2, dtype=np.uint32)
+    blender_mesh.edges.foreach_get('vertices', edge_vidxs)
+    return edge_vidxs.reshape(len(blender_mesh.edges), 2)
+
+
 def __get_positions(blender_mesh, key_blocks, armature, blender_object, export_settings):
     locs = np.empty(len(blender_mesh.vertices) * 3, dtype=np.float32)
     source = key_blocks[0].relative_key.data if key_blocks else blender_mesh.vertices
@@ -511,6 +534,57 @@ def __calc_morph_tangents(normals, morph_normal_deltas, tangents):
     return morph_tangent_deltas
 
 
+def __calc_morph_tangents_vectorized(normals, morph_normal_deltas, tangents):
+    """
+    Same as __calc_morph_tangents, on all loops at once.
+
+    Rotates each tangent by the rotation from the morphed normal to the normal (mathutils'
+    rotation_difference), using Rodrigues' rotation formula.
+    """
+    n = __normalized(normals.astype(np.float64))
+    morph_n = __normalized(normals + morph_normal_deltas.astype(np.float64))  # convert back to non-delta
+    t = tangents[:, :3].astype(np.float64)
+
+    # Rotation from morph_n to n: axis along c = morph_n x n, sin = |c|, cos = morph_n . n
+    c = np.cross(morph_n, n)
+    sin = np.linalg.norm(c, axis=1)
+    cos = np.einsum('ij,ij->i', morph_n, n)
+    axis = np.divide(c, sin[:, np.newaxis], out=np.zeros_like(c), where=sin[:, np.newaxis] > 0)
+
+    # Degenerate cases, like mathutils: same direction is no rotation,
+    # opposed directions is a half turn around an axis orthogonal to morph_n.
+    degenerate = sin <= np.finfo(np.float32).eps
+    opposed = degenerate & (cos <= 0)
+    if np.any(opposed):
+        axis[opposed] = __normalized(__ortho_vecs(morph_n[opposed]))
+    half_turn = opposed & np.any(axis != 0, axis=1)  # No axis (null morphed normal) is no rotation either
+    sin[degenerate] = 0.0
+    cos[degenerate] = np.where(half_turn[degenerate], -1.0, 1.0)
+
+    t_morph = (t * cos[:, np.newaxis]
+               + np.cross(axis, t) * sin[:, np.newaxis]
+               + axis * (np.einsum('ij,ij->i', axis, t) * (1.0 - cos))[:, np.newaxis])
+
+    return (t_morph - t).astype(np.float32)  # back to delta
+
+
+def __normalized(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms != 0)
+
+
+def __ortho_vecs(vectors):
+    """A vector orthogonal to each vector, chosen like Blender's ortho_v3_v3."""
+    x, y, z = vectors[:, 0], vectors[:, 1], vectors[:, 2]
+    ax, ay, az = np.abs(x), np.abs(y), np.abs(z)
+    dominant = np.where(ax > ay, np.where(ax > az, 0, 2), np.where(ay > az, 1, 2))
+    return np.select(
+        [(dominant == 0)[:, np.newaxis], (dominant == 1)[:, np.newaxis]],
+        [np.stack([-y - z, x, x], axis=1), np.stack([y, -x - z, y], axis=1)],
+        np.stack([z, z, -x - y], axis=1)
+    )
+
+
 def __get_uvs(blender_mesh, uv_i):
     layer = blender_mesh.uv_layers[uv_i]
     uvs = np.empty(len(blender_mesh.loops) * 2, dtype=np.float32)
@@ -541,38 +615,83 @@ def __get_colors(blender_mesh, color_i):
     return colors
 
 
+def get_vertex_group_elements(blender_mesh):
+    """
+    Get the vertex group elements of all verts: the number of elements of each vert, then the group and the
+    weight of each element, flattened in vert order.
+
+    Vertex group elements can't be read with foreach_get. This is the only per-vert Python loop left, and
+    vertex.groups is only read once per vert.
+    """
+    group_counts = np.empty(len(blender_mesh.vertices), dtype=np.int64)
+    elements = []
+    for vert_idx, vertex in enumerate(blender_mesh.vertices):
+        groups = vertex.groups
+        group_counts[vert_idx] = len(groups)
+        elements.extend([(g.group, g.weight) for g in groups])
+    elements = np.array(elements, dtype=np.float64).reshape(len(elements), 2)
+    return group_counts, elements[:, 0].astype(np.int64), elements[:, 1].astype(np.float32)
+
+
 def __get_bone_data(blender_mesh, skin, blender_vertex_groups):
+    """
+    Get the joints and weights of every vert, as two dense (vert count, 4 * num_joint_sets) arrays.
+
+    The influences of each vert are sorted by decreasing weight, unused slots are (0, 0.0).
+    """
     joint_name_to_index = {joint.name: index for index, joint in enumerate(skin.joints)}
-    group_to_joint = [joint_name_to_index.get(g.name) for g in blender_vertex_groups]
-
-    # List of (joint, weight) pairs for each vert
-    vert_bones = []
-    max_num_influences = 0
-
-    for vertex in blender_mesh.vertices:
-        bones = []
-        if vertex.groups:
-            for group_element in vertex.groups:
-                weight = group_element.weight
-                if weight <= 0.0:
-                    continue
-                try:
-                    joint = group_to_joint[group_element.group]
-                except Exception:
-                    continue
-                if joint is None:
-                    continue
-                bones.append((joint, weight))
-        bones.sort(key=lambda x: x[1], reverse=True)
-        if not bones: bones = ((0, 1.0),)  # HACK for verts with zero weight (#308)
-        vert_bones.append(bones)
-        if len(bones) > max_num_influences:
-            max_num_influences = len(bones)
+    group_to_joint = np.array(
+        [joint_name_to_index.get(g.name, -1) for g in blender_vertex_groups] + [-1],  # last one for invalid groups
+        dtype=np.int64
+    )
+
+    vertices = blender_mesh.vertices
+    group_counts, elem_groups, elem_weights = get_vertex_group_elements(blender_mesh)
+    elem_verts = np.repeat(np.arange(len(vertices)), group_counts)
+
+    elem_groups[(elem_groups < 0) | (elem_groups >= len(group_to_joint) - 1)] = len(group_to_joint) - 1
+    elem_joints = group_to_joint[elem_groups]
+    valid = (elem_weights > 0.0) & (elem_joints >= 0)
+    elem_verts = elem_verts[valid]
+    elem_joints = elem_joints[valid]
+    elem_weights = elem_weights[valid]
+
+    # Sort by vert, then by decreasing weight (stable, like the sort on each vert's list)
+    order = np.lexsort((-elem_weights, elem_verts))
+    elem_verts = elem_verts[order]
+    elem_joints = elem_joints[order]
+    elem_weights = elem_weights[order]
+
+    # Rank of each element among the influences of its vert
+    num_influences = np.bincount(elem_verts, minlength=len(vertices))
+    starts = np.cumsum(num_influences) - num_influences
+    ranks = np.arange(len(elem_verts)) - starts[elem_verts]
 
     # How many joint sets do we need? 1 set = 4 influences
+    # (verts without influences get one, see the HACK below)
+    max_num_influences = int(np.maximum(num_influences, 1).max(initial=0))
     num_joint_sets = (max_num_influences + 3) // 4
 
-    return vert_bones, num_joint_sets
+    vert_joints = np.zeros((len(vertices), 4 * num_joint_sets), dtype=np.uint32)
+    vert_weights = np.zeros((len(vertices), 4 * num_joint_sets), dtype=np.float32)
+    vert_joints[elem_verts, ranks] = elem_joints
+    vert_weights[elem_verts, ranks] = elem_weights
+
+    # HACK for verts with zero weight (#308)
+    vert_weights[num_influences == 0, :1] = 1.0
+
+    return vert_joints, vert_weights, num_joint_sets
+
+
+def __get_skin_attributes(blender_idxs, vert_joints, vert_weights, num_joint_sets):
+    """Slice the (n, 4) JOINTS_n/WEIGHTS_n attributes of a primitive out of the per vert bone data."""
+    attributes = {}
+    joints = vert_joints[blender_idxs]
+    weights = vert_weights[blender_idxs]
+    for i in range(num_joint_sets):
+        attributes['JOINTS_%d' % i] = joints[:, 4 * i:4 * i + 4]
+        attributes['WEIGHTS_%d' % i] = weights[:, 4 * i:4 * i + 4]
+    return attributes
 
 
 def __zup2yup(array):
@@ -15,9 +15,10 @@
 import bpy
 
 from ...io.com import gltf2_io
-from ...io.com.gltf2_io_debug import print_console
 from . import gltf2_blender_gather_nodes
 from . import gltf2_blender_gather_animations
+from . import gltf2_blender_bake
+from . import gltf2_blender_gather_cache
 from .gltf2_blender_gather_cache import cached
 from ..com.gltf2_blender_extras import generate_extras
 from . import gltf2_blender_export_keys
@@ -31,6 +32,10 @@ def gather_gltf2(export_settings):
 
     :return: list of scene graphs to be added to the glTF export
     """
+    # the settings are hashed once, cached results of previous exports are dropped on the first cached call
+    gltf2_blender_gather_cache.set_settings_fingerprint(export_settings)
+    gltf2_blender_gather_cache.reset_cache_stats()
+
     scenes = []
     animations = []  # unfortunately animations in gltf2 are just as 'root' as scenes.
     active_scene = None
@@ -40,6 +45,8 @@ def gather_gltf2(export_settings):
             animations += __gather_animations(blender_scene, export_settings)
         if bpy.context.scene.name == blender_scene.name:
             active_scene = len(scenes) -1
+
+    gltf2_blender_gather_cache.print_cache_stats()
     return active_scene, scenes, animations
 
 
@@ -70,16 +77,35 @@ def __gather_animations(blender_scene, export_settings):
     animations = []
     merged_tracks = {}
 
-    for blender_object in blender_scene.objects:
-
-        # First check if this object is exported or not. Do not export animation of not exported object
-        obj_node = gltf2_blender_gather_nodes.gather_node(blender_object,
-            blender_object.library.name if blender_object.library else None,
-            blender_scene, None, export_settings)
-        if obj_node is not None:
+    # Do not export animation of not exported object. Nodes are all gathered with the scene at this point
+    blender_objects = [
+        blender_object for blender_object in blender_scene.objects
+        if gltf2_blender_gather_nodes.get_gathered_node(
+            blender_object, blender_object.library.name if blender_object.library else None, export_settings) is not None
+    ]
+
+    # Baked data only lives for the gathering of the animations of this scene
+    bake_store = gltf2_blender_bake.BakeStore(export_settings['gltf_bake_cache_size'] * 1024 * 1024)
+    export_settings['gltf_bake_store'] = bake_store
+    # Sampler outputs are computed from the keyframe arrays once all actions are gathered, in parallel
+    export_settings['gltf_sampler_output_jobs'] = \
+        gltf2_blender_bake.SamplerOutputJobs() if export_settings['gltf_parallel_animations'] else None
+    try:
+        if export_settings['gltf_force_sampling']:
+            # Bake all armatures in a single pass over the timeline, instead of once per action
+            gltf2_blender_gather_animations.bake_armature_actions(blender_objects, bake_store, export_settings)
+
+        for blender_object in blender_objects:
             animations_, merged_tracks = gltf2_blender_gather_animations.gather_animations(blender_object, merged_tracks, len(animations), export_settings)
             animations += animations_
 
+        if export_settings['gltf_sampler_output_jobs'] is not None:
+            export_settings['gltf_sampler_output_jobs'].run()
+    finally:
+        bake_store.clear()
+        export_settings['gltf_bake_store'] = None
+        export_settings['gltf_sampler_output_jobs'] = None
+
     if export_settings['gltf_nla_strips'] is False:
         # Fake an animation with all animations of the scene
         merged_tracks = {}
@@ -87,67 +113,7 @@ def __gather_animations(blender_scene, export_settings):
         for idx, animation in enumerate(animations):
             merged_tracks['Animation'].append(idx)
 
-
-    to_delete_idx = []
-    for merged_anim_track in merged_tracks.keys():
-        if len(merged_tracks[merged_anim_track]) < 2:
-
-            # There is only 1 animation in the track
-            # If name of the track is not a default name, use this name for action
-            if len(merged_tracks[merged_anim_track]) != 0:
-                animations[merged_tracks[merged_anim_track][0]].name = merged_anim_track
-
-            continue
-
-        base_animation_idx = None
-        offset_sampler = 0
-
-        for idx, anim_idx in enumerate(merged_tracks[merged_anim_track]):
-            if idx == 0:
-                base_animation_idx = anim_idx
-                animations[anim_idx].name = merged_anim_track
-                already_animated = []
-                for channel in animations[anim_idx].channels:
-                    already_animated.append((channel.target.node, channel.target.path))
-                continue
-
-            to_delete_idx.append(anim_idx)
-
-            # Merging extensions
-            # Provide a hook to handle extension merging since there is no way to know author intent
-            export_user_extensions('merge_animation_extensions_hook', export_settings, animations[anim_idx], animations[base_animation_idx])
-
-            # Merging extras
-            # Warning, some values can be overwritten if present in multiple merged animations
-            if animations[anim_idx].extras is not None:
-                for k in animations[anim_idx].extras.keys():
-                    if animations[base_animation_idx].extras is None:
-                        animations[base_animation_idx].extras = {}
-                    animations[base_animation_idx].extras[k] = animations[anim_idx].extras[k]
-
-            offset_sampler = len(animations[base_animation_idx].samplers)
-            for sampler in animations[anim_idx].samplers:
-                animations[base_animation_idx].samplers.append(sampler)
-
-            for channel in animations[anim_idx].channels:
-                if (channel.target.node, channel.target.path) in already_animated:
-                    print_console("WARNING", "Some strips have same channel animation ({}), on node {} !".format(channel.target.path, channel.target.node.name))
-                    continue
-                animations[base_animation_idx].channels.append(channel)
-                animations[base_animation_idx].channels[-1].sampler = animations[base_animation_idx].channels[-1].sampler + offset_sampler
-                already_animated.append((channel.target.node, channel.target.path))
-
-    new_animations = []
-    if len(to_delete_idx) != 0:
-        for idx, animation in enumerate(animations):
-            if idx in to_delete_idx:
-                continue
-            new_animations.append(animation)
-    else:
-        new_animations = animations
-
-
-    return new_animations
+    return gltf2_blender_gather_animations.merge_animation_tracks(animations, merged_tracks, export_settings)
 
 
 def __gather_extras(blender_object, export_settings):
@@ -141,11 +141,8 @@ def gather_animation_channels(blender_action: bpy.types.Action,
                 channels.append(channel)
 
 
-    # resetting driver caches
-    gltf2_blender_gather_drivers.get_sk_driver_values.reset_cache()
+    # resetting driver cache
     gltf2_blender_gather_drivers.get_sk_drivers.reset_cache()
-    # resetting bone caches
-    gltf2_blender_gather_animation_sampler_keyframes.get_bone_matrix.reset_cache()
 
     return channels
 
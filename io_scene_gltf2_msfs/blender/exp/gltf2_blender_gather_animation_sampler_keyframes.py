@@ -13,45 +13,42 @@
 # limitations under the License.
 
 import bpy
-import mathutils
 import typing
 
-from .gltf2_blender_gather_cache import cached, bonecache
+from .gltf2_blender_gather_cache import cached
 from ..com import gltf2_blender_math
 from . import gltf2_blender_get
-from .gltf2_blender_gather_drivers import get_sk_drivers, get_sk_driver_values
+from . import gltf2_blender_bake
 from . import gltf2_blender_export_keys
 from ...io.com import gltf2_io_debug
 import numpy as np
 
 
-class Keyframe:
-    def __init__(self, channels: typing.Tuple[bpy.types.FCurve], frame: float, bake_channel: typing.Union[str, None]):
-        self.seconds = frame / bpy.context.scene.render.fps
-        self.frame = frame
-        self.fps = bpy.context.scene.render.fps
-        self.__length_morph = 0
+class KeyframeTrack:
+    """
+    The keyframes of a channel, stored by column.
+
+    frames and seconds are (n,) arrays. values, in_tangents and out_tangents are (n, target length) arrays of
+    the components of the Blender property. Tangents are None when there are none (not cubic spline).
+    sampling is the (start frame, end frame, step, fps) the frames were sampled with, None if they weren't.
+    """
+    __slots__ = ('target', 'indices', 'frames', 'seconds', 'values', 'in_tangents', 'out_tangents', 'sampling')
+
+    def __init__(self, channels: typing.Tuple[bpy.types.FCurve], frames: typing.Sequence[float], fps: float,
+                 bake_channel: typing.Union[str, None]):
+        length_morph = 0
         # Note: channels has some None items only for SK if some SK are not animated
         if bake_channel is None:
             self.target = [c for c in channels if c is not None][0].data_path.split('.')[-1]
             if self.target != "value":
-                self.__indices = [c.array_index for c in channels]
+                self.indices = [c.array_index for c in channels]
             else:
-                self.__indices = [i for i, c in enumerate(channels) if c is not None]
-                self.__length_morph = len(channels)
+                self.indices = [i for i, c in enumerate(channels) if c is not None]
+                length_morph = len(channels)
         else:
             self.target = bake_channel
-            self.__indices = []
-            for i in range(self.get_target_len()):
-                self.__indices.append(i)
-
+            self.indices = None
 
-        # Data holders for virtual properties
-        self.__value = None
-        self.__in_tangent = None
-        self.__out_tangent = None
-
-    def get_target_len(self):
         length = {
             "delta_location": 3,
             "delta_rotation_euler": 3,
@@ -60,127 +57,72 @@ class Keyframe:
             "rotation_euler": 3,
             "rotation_quaternion": 4,
             "scale": 3,
-            "value": self.__length_morph
+            "value": length_morph
         }.get(self.target)
 
         if length is None:
             raise RuntimeError("Animations with target type '{}' are not supported.".format(self.target))
 
-        return length
-
-    def __set_indexed(self, value):
-        # Sometimes blender animations only reference a subset of components of a data target. Keyframe should always
-        # contain a complete Vector/ Quaternion --> use the array_index value of the keyframe to set components in such
-        # structures
-        # For SK, must contains all SK values
-        result = [0.0] * self.get_target_len()
-        for i, v in zip(self.__indices, value):
-            result[i] = v
-        return result
-
-    def get_indices(self):
-        return self.__indices
-
-    def set_value_index(self, idx, val):
-        self.__value[idx] = val
-
-    def set_value_index_in(self, idx, val):
-        self.__in_tangent[idx] = val
-
-    def set_value_index_out(self, idx, val):
-        self.__out_tangent[idx] = val
-
-    def set_first_tangent(self):
-        self.__in_tangent = self.__value
-
-    def set_last_tangent(self):
-        self.__out_tangent = self.__value
-
-    @property
-    def value(self) -> typing.Union[mathutils.Vector, mathutils.Euler, mathutils.Quaternion, typing.List[float]]:
-        if self.target == "value":
-            return self.__value
-        return gltf2_blender_math.list_to_mathutils(self.__value, self.target)
-
-    @value.setter
-    def value(self, value: typing.List[float]):
-        self.__value = self.__set_indexed(value)
-
-    @property
-    def in_tangent(self) -> typing.Union[mathutils.Vector, mathutils.Euler, mathutils.Quaternion, typing.List[float]]:
-        if self.__in_tangent is None:
-            return None
-        if self.target == "value":
-            return self.__in_tangent
-        return gltf2_blender_math.list_to_mathutils(self.__in_tangent, self.target)
-
-    @in_tangent.setter
-    def in_tangent(self, value: typing.List[float]):
-        self.__in_tangent = self.__set_indexed(value)
-
-    @property
-    def out_tangent(self) -> typing.Union[mathutils.Vector, mathutils.Euler, mathutils.Quaternion, typing.List[float]]:
-        if self.__out_tangent is None:
-            return None
-        if self.target == "value":
-            return self.__out_tangent
-        return gltf2_blender_math.list_to_mathutils(self.__out_tangent, self.target)
-
-    @out_tangent.setter
-    def out_tangent(self, value: typing.List[float]):
-        self.__out_tangent = self.__set_indexed(value)
-
-
-
-@bonecache
-def get_bone_matrix(blender_object_if_armature: typing.Optional[bpy.types.Object],
-                     channels: typing.Tuple[bpy.types.FCurve],
-                     bake_bone: typing.Union[str, None],
-                     bake_channel: typing.Union[str, None],
-                     bake_range_start,
-                     bake_range_end,
-                     action_name: str,
-                     current_frame: int,
-                     step: int
-                     ):
-
-    data = {}
-
-    # Always using bake_range, because some bones may need to be baked,
-    # even if user didn't request it
-
-    start_frame = bake_range_start
-    end_frame = bake_range_end
-
-
-    frame = start_frame
-    while frame <= end_frame:
-        data[frame] = {}
-        # we need to bake in the constraints
-        bpy.context.scene.frame_set(int(frame))
-        for pbone in blender_object_if_armature.pose.bones:
-            if bake_bone is None:
-                matrix = pbone.matrix_basis.copy()
-            else:
-                if (pbone.bone.use_inherit_rotation == False or pbone.bone.inherit_scale != "FULL") and pbone.parent != None:
-                    rest_mat = (pbone.parent.bone.matrix_local.inverted_safe() @ pbone.bone.matrix_local)
-                    matrix = (rest_mat.inverted_safe() @ pbone.parent.matrix.inverted_safe() @ pbone.matrix)
-                else:
-                    matrix = pbone.matrix
-                    matrix = blender_object_if_armature.convert_space(pose_bone=pbone, matrix=matrix, from_space='POSE', to_space='LOCAL')
-
-
-            data[frame][pbone.name] = matrix
-
-
-        # If some drivers must be evaluated, do it here, to avoid to have to change frame by frame later
-        drivers_to_manage = get_sk_drivers(blender_object_if_armature)
-        for dr_obj, dr_fcurves in drivers_to_manage:
-            vals = get_sk_driver_values(dr_obj, frame, dr_fcurves)
-
-        frame += step
+        if self.indices is None:
+            self.indices = list(range(length))
+
+        self.frames = np.array(frames, dtype=np.float64)
+        self.seconds = self.frames / fps
+        self.values = np.zeros((len(self.frames), length), dtype=np.float64)
+        self.in_tangents = None
+        self.out_tangents = None
+        self.sampling = None
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_target_len(self) -> int:
+        return self.values.shape[1]
+
+    def set_values(self, values: np.ndarray, non_keyed_values: typing.Optional[typing.Tuple[typing.Optional[float]]] = None):
+        """
+        Set the (n, len(values[0])) values of the keyed components.
+
+        Sometimes blender animations only reference a subset of components of a data target. Keyframes always
+        contain complete Vectors/Quaternions: values are set at the array_index of each channel, and the other
+        components are completed with the non keyed values, if any.
+        """
+        self.__set_indexed(self.values, values, non_keyed_values)
+
+    def set_tangents(self, in_tangents: np.ndarray, out_tangents: np.ndarray,
+                     non_keyed_values: typing.Tuple[typing.Optional[float]]):
+        """Set the (n, len(tangents[0])) tangents of the keyed components, from the first and to the last values."""
+        self.in_tangents = np.zeros_like(self.values)
+        self.out_tangents = np.zeros_like(self.values)
+        self.__set_indexed(self.in_tangents, in_tangents, non_keyed_values)
+        self.__set_indexed(self.out_tangents, out_tangents, non_keyed_values)
+        # First in tangent and last out tangent are the keyframes themselves (zero tangents)
+        self.in_tangents[0] = self.values[0]
+        self.out_tangents[-1] = self.values[-1]
+
+    def __set_indexed(self, target: np.ndarray, values: np.ndarray,
+                      non_keyed_values: typing.Optional[typing.Tuple[typing.Optional[float]]]):
+        values = np.asarray(values, dtype=np.float64).reshape(len(target), -1)
+        for column, index in enumerate(self.indices[:values.shape[1]]):
+            target[:, index] = values[:, column]
+        if non_keyed_values is not None:
+            for index in range(target.shape[1]):
+                if index not in self.indices:  # this is a keyed array_index or a SK animated
+                    target[:, index] = non_keyed_values[index]
+
+    def select(self, keys: typing.Sequence[int]) -> 'KeyframeTrack':
+        """Get a track of some of the keyframes only."""
+        track = object.__new__(KeyframeTrack)
+        track.target = self.target
+        track.indices = self.indices
+        track.frames = self.frames[keys]
+        track.seconds = self.seconds[keys]
+        track.values = self.values[keys]
+        track.in_tangents = None if self.in_tangents is None else self.in_tangents[keys]
+        track.out_tangents = None if self.out_tangents is None else self.out_tangents[keys]
+        track.sampling = None
+        return track
 
-    return data
 
 # cache for performance reasons
 @cached
@@ -195,7 +137,7 @@ def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Objec
                      driver_obj,
                      node_channel_is_animated: bool,
                      export_settings
-                     ) -> typing.List[Keyframe]:
+                     ) -> typing.Optional[KeyframeTrack]:
     """Convert the blender action groups' fcurves to keyframes for use in glTF."""
     if bake_bone is None and driver_obj is None:
         # Find the start and end of the whole action group
@@ -208,7 +150,8 @@ def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Objec
         start_frame = bake_range_start
         end_frame = bake_range_end
 
-    keyframes = []
+    fps = bpy.context.scene.render.fps
+
     if needs_baking(blender_object_if_armature, channels, export_settings):
         # Bake the animation, by evaluating the animation for all frames
         # TODO: maybe baking can also be done with FCurve.convert_to_samples
@@ -223,92 +166,91 @@ def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Objec
             pose_bone_if_armature = None
 
         # sample all frames
-        frame = start_frame
         step = export_settings['gltf_frame_step']
-        while frame <= end_frame:
-            key = Keyframe(channels, frame, bake_channel)
-            if isinstance(pose_bone_if_armature, bpy.types.PoseBone):
-
-                mat = get_bone_matrix(
+        bake_store = export_settings['gltf_bake_store']
+        frames = gltf2_blender_bake.get_frames(start_frame, end_frame, step)
+        keyframes = KeyframeTrack(channels, frames, fps, bake_channel)
+        keyframes.sampling = (start_frame, end_frame, step, fps)
+
+        if isinstance(pose_bone_if_armature, bpy.types.PoseBone):
+            # Read the baked matrices of the bone for all frames at once
+            bone_matrices = gltf2_blender_bake.get_bone_matrices(
+                blender_object_if_armature,
+                pose_bone_if_armature.name,
+                action_name,
+                frames,
+                bake_bone is not None,
+                gltf2_blender_bake.get_frames(bake_range_start, bake_range_end, step),
+                bake_store
+            )
+            trans, rot, scale = gltf2_blender_math.decompose_matrices(bone_matrices)
+
+            if bake_channel is None:
+                target_property = channels[0].data_path.split('.')[-1]
+            else:
+                target_property = bake_channel
+            keyframes.set_values({
+                "location": trans,
+                "rotation_axis_angle": rot,
+                "rotation_euler": rot,
+                "rotation_quaternion": rot,
+                "scale": scale
+            }[target_property])
+        elif driver_obj is None:
+            # Note: channels has some None items only for SK if some SK are not animated
+            keyframes.set_values(
+                [[c.evaluate(frame) for c in channels if c is not None] for frame in frames],
+                non_keyed_values
+            )
+        else:
+            # Driver values are baked along the bones of the armature
+            keyframes.set_values(
+                gltf2_blender_bake.get_sk_driver_values(
                     blender_object_if_armature,
+                    driver_obj,
                     channels,
-                    bake_bone,
-                    bake_channel,
-                    bake_range_start,
-                    bake_range_end,
                     action_name,
-                    frame,
-                    step
-                )
-                trans, rot, scale = mat.decompose()
-
-                if bake_channel is None:
-                    target_property = channels[0].data_path.split('.')[-1]
-                else:
-                    target_property = bake_channel
-                key.value = {
-                    "location": trans,
-                    "rotation_axis_angle": rot,
-                    "rotation_euler": rot,
-                    "rotation_quaternion": rot,
-                    "scale": scale
-                }[target_property]
-            else:
-                if driver_obj is None:
-                    # Note: channels has some None items only for SK if some SK are not animated
-                    key.value = [c.evaluate(frame) for c in channels if c is not None]
-                    complete_key(key, non_keyed_values)
-                else:
-                    key.value = get_sk_driver_values(driver_obj, frame, channels)
-                    complete_key(key, non_keyed_values)
-            keyframes.append(key)
-            frame += step
+                    frames,
+                    gltf2_blender_bake.get_frames(bake_range_start, bake_range_end, step),
+                    bake_store
+                ),
+                non_keyed_values
+            )
+
+        if export_settings['gltf_reduce_keyframes'] and __is_baked_linear(channels, bake_bone):
+            keyframes = reduce_keyframes(keyframes, export_settings)
     else:
         # Just use the keyframes as they are specified in blender
         # Note: channels has some None items only for SK if some SK are not animated
-        frames = [keyframe.co[0] for keyframe in [c for c in channels if c is not None][0].keyframe_points]
+        keyed_channels = [c for c in channels if c is not None]
+        frames = [keyframe.co[0] for keyframe in keyed_channels[0].keyframe_points]
         # some weird files have duplicate frame at same time, removed them
         frames = sorted(set(frames))
-        for i, frame in enumerate(frames):
-            key = Keyframe(channels, frame, bake_channel)
-            # key.value = [c.keyframe_points[i].co[0] for c in action_group.channels]
-            key.value = [c.evaluate(frame) for c in channels if c is not None]
-            # Complete key with non keyed values, if needed
-            if len([c for c in channels if c is not None]) != key.get_target_len():
-                complete_key(key, non_keyed_values)
-
-            # compute tangents for cubic spline interpolation
-            if [c for c in channels if c is not None][0].keyframe_points[0].interpolation == "BEZIER":
-                # Construct the in tangent
-                if frame == frames[0]:
-                    # start in-tangent should become all zero
-                    key.set_first_tangent()
-                else:
-                    # otherwise construct an in tangent coordinate from the keyframes control points. We intermediately
-                    # use a point at t-1 to define the tangent. This allows the tangent control point to be transformed
-                    # normally
-                    key.in_tangent = [
-                        c.keyframe_points[i].co[1] + ((c.keyframe_points[i].co[1] - c.keyframe_points[i].handle_left[1]
-                                                       ) / (frame - frames[i - 1]))
-                        for c in channels if c is not None
-                    ]
-                # Construct the out tangent
-                if frame == frames[-1]:
-                    # end out-tangent should become all zero
-                    key.set_last_tangent()
-                else:
-                    # otherwise construct an in tangent coordinate from the keyframes control points. We intermediately
-                    # use a point at t+1 to define the tangent. This allows the tangent control point to be transformed
-                    # normally
-                    key.out_tangent = [
-                        c.keyframe_points[i].co[1] + ((c.keyframe_points[i].handle_right[1] - c.keyframe_points[i].co[1]
-                                                       ) / (frames[i + 1] - frame))
-                        for c in channels if c is not None
-                    ]
-
-                complete_key_tangents(key, non_keyed_values)
-
-            keyframes.append(key)
+        keyframes = KeyframeTrack(channels, frames, fps, bake_channel)
+        # Complete keys with non keyed values, if needed
+        keyframes.set_values([[c.evaluate(frame) for c in keyed_channels] for frame in frames], non_keyed_values)
+
+        # compute tangents for cubic spline interpolation
+        if keyed_channels[0].keyframe_points[0].interpolation == "BEZIER":
+            # Construct tangent coordinates from the keyframes control points. We intermediately use a point at t-1
+            # (in) and t+1 (out) to define the tangent. This allows the tangent control point to be transformed
+            # normally. The start in-tangent and end out-tangent should become all zero.
+            key_count = len(frames)
+            co = np.empty((len(keyed_channels), key_count))
+            handle_left = np.empty((len(keyed_channels), key_count))
+            handle_right = np.empty((len(keyed_channels), key_count))
+            for c_idx, c in enumerate(keyed_channels):
+                points = [c.keyframe_points[i] for i in range(key_count)]
+                co[c_idx] = [k.co[1] for k in points]
+                handle_left[c_idx] = [k.handle_left[1] for k in points]
+                handle_right[c_idx] = [k.handle_right[1] for k in points]
+
+            frame_deltas = np.diff(np.array(frames, dtype=np.float64))
+            in_tangents = co.copy()
+            out_tangents = co.copy()
+            in_tangents[:, 1:] += (co[:, 1:] - handle_left[:, 1:]) / frame_deltas
+            out_tangents[:, :-1] += (handle_right[:, :-1] - co[:, :-1]) / frame_deltas
+            keyframes.set_tangents(in_tangents.T, out_tangents.T, non_keyed_values)
 
     # For armature only
     # Check if all values are the same
@@ -320,42 +262,122 @@ def gather_keyframes(blender_object_if_armature: typing.Optional[bpy.types.Objec
 
         if node_channel_is_animated is True: # fcurve on this bone for this property
              # Keep animation, but keep only 2 keyframes if data are not changing
-             return [keyframes[0], keyframes[-1]] if cst is True and len(keyframes) >= 2 else keyframes
+             return keyframes.select([0, -1]) if cst is True and len(keyframes) >= 2 else keyframes
         else: # bone is not animated (no fcurve)
             # Not keeping if not changing property
             return None if cst is True else keyframes
     else:
         # For objects, if all values are the same, we keep only first and last
         cst = fcurve_is_constant(keyframes)
-        return [keyframes[0], keyframes[-1]] if cst is True and len(keyframes) >= 2 else keyframes
-
+        return keyframes.select([0, -1]) if cst is True and len(keyframes) >= 2 else keyframes
 
-    return keyframes
 
+def __is_baked_linear(channels: typing.Tuple[bpy.types.FCurve], bake_bone: typing.Union[str, None]) -> bool:
+    """Check if baked keyframes are exported with LINEAR interpolation, as chosen when gathering the sampler."""
+    if bake_bone is not None:
+        return True
+    channels = [c for c in channels if c is not None]
+    if max([len(c.keyframe_points) for c in channels]) < 2:
+        return False
+    return not all(all(k.interpolation == 'CONSTANT' for k in c.keyframe_points) for c in channels)
 
-def fcurve_is_constant(keyframes):
-    return all([j < 0.0001 for j in np.ptp([[k.value[i] for i in range(len(keyframes[0].value))] for k in keyframes], axis=0)])
 
-def complete_key(key: Keyframe, non_keyed_values: typing.Tuple[typing.Optional[float]]):
-    """
-    Complete keyframe with non keyed values
+def reduce_keyframes(keyframes: KeyframeTrack, export_settings) -> KeyframeTrack:
     """
-    for i in range(0, key.get_target_len()):
-        if i in key.get_indices():
-            continue # this is a keyed array_index or a SK animated
-        key.set_value_index(i, non_keyed_values[i])
+    Remove the baked keyframes that linear interpolation of the remaining ones rebuilds within tolerance.
 
-def complete_key_tangents(key: Keyframe, non_keyed_values: typing.Tuple[typing.Optional[float]]):
-    """
-    Complete keyframe with non keyed values for tangents
+    Tolerances are per path: distance for locations, angle for rotations and per component difference for
+    scales. Other paths are kept as is.
     """
-    for i in range(0, key.get_target_len()):
-        if i in key.get_indices():
-            continue # this is a keyed array_index or a SK animated
-        if key.in_tangent is not None:
-            key.set_value_index_in(i, non_keyed_values[i])
-        if key.out_tangent is not None:
-            key.set_value_index_out(i, non_keyed_values[i])
+    if len(keyframes) <= 2:
+        return keyframes
+
+    target = keyframes.target
+    if target in ("location", "delta_location"):
+        tolerance = export_settings['gltf_reduce_location_tolerance']
+        interpolate, errors = __lerp, __distance_errors
+    elif target in ("rotation_axis_angle", "rotation_euler", "rotation_quaternion", "delta_rotation_euler"):
+        tolerance = export_settings['gltf_reduce_rotation_tolerance']
+        interpolate, errors = __slerp, __angle_errors
+    elif target == "scale":
+        tolerance = export_settings['gltf_reduce_scale_tolerance']
+        interpolate, errors = __lerp, __component_errors
+    else:
+        return keyframes
+
+    frames = keyframes.frames
+    values = gltf2_blender_math.lists_to_array(keyframes.values, target)
+    if interpolate is __slerp:
+        values = gltf2_blender_math.normalize_quaternions(values)
+
+    def rebuilds(start, end):
+        if end - start < 2:
+            return True
+        factors = (frames[start + 1:end] - frames[start]) / (frames[end] - frames[start])
+        rebuilt = interpolate(values[start], values[end], factors)
+        return bool(np.all(errors(values[start + 1:end], rebuilt) <= tolerance))
+
+    # Greedily extend each segment as far as it rebuilds all the keyframes it skips:
+    # double its length while it does, then bisect between the last good and first bad ends
+    kept = [0]
+    last = len(keyframes) - 1
+    start = 0
+    while start < last:
+        good, bad = start + 1, None
+        length = 1
+        while good < last:
+            end = min(good + length, last)
+            if not rebuilds(start, end):
+                bad = end
+                break
+            good = end
+            length *= 2
+        if bad is not None:
+            while bad - good > 1:
+                middle = (good + bad) // 2
+                if rebuilds(start, middle):
+                    good = middle
+                else:
+                    bad = middle
+        kept.append(good)
+        start = good
+
+    return keyframes.select(kept)
+
+
+def __lerp(start: np.ndarray, end: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    return start + (end - start) * factors[:, np.newaxis]
+
+
+def __slerp(start: np.ndarray, end: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    # Short way, as the sampler output keeps consecutive rotations in the same hemisphere
+    dot = float(np.dot(start, end))
+    if dot < 0.0:
+        end = -end
+        dot = -dot
+    if dot > 0.9995:
+        return gltf2_blender_math.normalize_quaternions(__lerp(start, end, factors))
+    angle = np.arccos(dot)
+    return (np.sin((1.0 - factors) * angle)[:, np.newaxis] * start +
+            np.sin(factors * angle)[:, np.newaxis] * end) / np.sin(angle)
+
+
+def __distance_errors(values: np.ndarray, rebuilt: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(values - rebuilt, axis=1)
+
+
+def __angle_errors(values: np.ndarray, rebuilt: np.ndarray) -> np.ndarray:
+    dots = np.abs(np.einsum('ij,ij->i', values, rebuilt))
+    return 2.0 * np.arccos(np.minimum(dots, 1.0))
+
+
+def __component_errors(values: np.ndarray, rebuilt: np.ndarray) -> np.ndarray:
+    return np.abs(values - rebuilt).max(axis=1)
+
+
+def fcurve_is_constant(keyframes: KeyframeTrack):
+    values = gltf2_blender_math.lists_to_array(keyframes.values, keyframes.target)
+    return all([j < 0.0001 for j in np.ptp(values, axis=0)])
 
 def needs_baking(blender_object_if_armature: typing.Optional[bpy.types.Object],
                  channels: typing.Tuple[bpy.types.FCurve],
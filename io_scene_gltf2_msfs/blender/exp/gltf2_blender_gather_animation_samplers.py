@@ -13,13 +13,16 @@
 # limitations under the License.
 
 
+import functools
 import typing
 
 import bpy
 import mathutils
+import numpy as np
 from ..com import gltf2_blender_math
 from ..com.gltf2_blender_data_path import get_target_property_name, get_target_object_path
 from . import gltf2_blender_gather_animation_sampler_keyframes
+from . import gltf2_blender_bake
 from .gltf2_blender_gather_cache import cached
 from . import gltf2_blender_gather_accessors
 from . import gltf2_blender_get
@@ -255,14 +258,27 @@ def __gather_input(channels: typing.Tuple[bpy.types.FCurve],
     if keyframes is None:
         # After check, no need to animation this node
         return None
-    times = [k.seconds for k in keyframes]
+    if keyframes.sampling is not None:
+        # Sampled channels over the same range share their time codes
+        return __gather_sampled_input(*keyframes.sampling, export_settings)
+    return __gather_times_accessor(keyframes.seconds, export_settings)
 
+
+@cached
+def __gather_sampled_input(frame_start, frame_end, step, fps, export_settings) -> gltf2_io.Accessor:
+    """Gather the key time codes of a sampling, once per export."""
+    frames = np.array(gltf2_blender_bake.get_frames(frame_start, frame_end, step), dtype=np.float64)
+    return __gather_times_accessor(frames / fps, export_settings)
+
+
+def __gather_times_accessor(seconds: np.ndarray, export_settings) -> gltf2_io.Accessor:
+    times = seconds.astype(np.float32)
     return gltf2_blender_gather_accessors.gather_accessor(
-        gltf2_io_binary_data.BinaryData.from_list(times, gltf2_io_constants.ComponentType.Float),
+        gltf2_io_binary_data.BinaryData.from_array(times),
         gltf2_io_constants.ComponentType.Float,
         len(times),
-        tuple([max(times)]),
-        tuple([min(times)]),
+        tuple([float(times.max())]),
+        tuple([float(times.min())]),
         gltf2_io_constants.DataType.Scalar,
         export_settings
     )
@@ -380,53 +396,11 @@ def __gather_output(channels: typing.Tuple[bpy.types.FCurve],
     else:
         transform = parent_inverse
 
-    values = []
-    for keyframe in keyframes:
-        # Transform the data and build gltf control points
-        value = gltf2_blender_math.transform(keyframe.value, target_datapath, transform)
-        if is_yup and not is_armature_animation:
-            value = gltf2_blender_math.swizzle_yup(value, target_datapath)
-        keyframe_value = gltf2_blender_math.mathutils_to_gltf(value)
-
-        if keyframe.in_tangent is not None:
-            # we can directly transform the tangent as it currently is represented by a control point
-            in_tangent = gltf2_blender_math.transform(keyframe.in_tangent, target_datapath, transform)
-            if is_yup and blender_object_if_armature is None:
-                in_tangent = gltf2_blender_math.swizzle_yup(in_tangent, target_datapath)
-            # the tangent in glTF is relative to the keyframe value
-            if not isinstance(value, list):
-                in_tangent = value - in_tangent
-            else:
-                in_tangent = [value[i] - in_tangent[i] for i in range(len(value))]
-            keyframe_value = gltf2_blender_math.mathutils_to_gltf(in_tangent) + keyframe_value  # append
-
-        if keyframe.out_tangent is not None:
-            # we can directly transform the tangent as it currently is represented by a control point
-            out_tangent = gltf2_blender_math.transform(keyframe.out_tangent, target_datapath, transform)
-            if is_yup and blender_object_if_armature is None:
-                out_tangent = gltf2_blender_math.swizzle_yup(out_tangent, target_datapath)
-            # the tangent in glTF is relative to the keyframe value
-            if not isinstance(value, list):
-                out_tangent = value - out_tangent
-            else:
-                out_tangent = [value[i] - out_tangent[i] for i in range(len(value))]
-            keyframe_value = keyframe_value + gltf2_blender_math.mathutils_to_gltf(out_tangent)  # append
-
-        values += keyframe_value
-
-    # store the keyframe data in a binary buffer
-    component_type = gltf2_io_constants.ComponentType.Float
-    if get_target_property_name(target_datapath) == "value":
-        # channels with 'weight' targets must have scalar accessors
-        data_type = gltf2_io_constants.DataType.Scalar
-    else:
-        data_type = gltf2_io_constants.DataType.vec_type_from_num(len(keyframes[0].value))
-
-    return gltf2_io.Accessor(
-        buffer_view=gltf2_io_binary_data.BinaryData.from_list(values, component_type),
+    accessor = gltf2_io.Accessor(
+        buffer_view=None,
         byte_offset=None,
-        component_type=component_type,
-        count=len(values) // gltf2_io_constants.DataType.num_elements(data_type),
+        component_type=gltf2_io_constants.ComponentType.Float,
+        count=None,
         extensions=None,
         extras=None,
         max=None,
@@ -434,5 +408,85 @@ def __gather_output(channels: typing.Tuple[bpy.types.FCurve],
         name=None,
         normalized=None,
         sparse=None,
-        type=data_type
+        type=None
     )
+
+    # Snapshot the transform: the rest of the work doesn't need the scene, and may run off the main thread
+    fill_output = functools.partial(__fill_output,
+                                    accessor,
+                                    keyframes,
+                                    target_datapath,
+                                    np.array(transform, dtype=np.float64),
+                                    is_yup and not is_armature_animation,
+                                    is_yup and blender_object_if_armature is None)
+    output_jobs = export_settings['gltf_sampler_output_jobs']
+    if output_jobs is None:
+        fill_output()
+    else:
+        output_jobs.add(action_name, fill_output)
+
+    return accessor
+
+
+def __fill_output(accessor: gltf2_io.Accessor,
+                  keyframes: gltf2_blender_gather_animation_sampler_keyframes.KeyframeTrack,
+                  target_datapath: str,
+                  transform: np.ndarray,
+                  swizzle_values: bool,
+                  swizzle_tangents: bool):
+    """Convert the keyframes to glTF control points, and store them in the accessor."""
+    # Transform the data of all keyframes at once, as (n_keys, n_components) arrays
+    value = __keyframes_to_array(keyframes.values, target_datapath, transform, swizzle_values)
+    in_tangent = None
+    out_tangent = None
+    if keyframes.in_tangents is not None:
+        # we can directly transform the tangent as it currently is represented by a control point
+        in_tangent = __keyframes_to_array(keyframes.in_tangents, target_datapath, transform, swizzle_tangents)
+        # the tangent in glTF is relative to the keyframe value
+        in_tangent = value - in_tangent
+    if keyframes.out_tangents is not None:
+        out_tangent = __keyframes_to_array(keyframes.out_tangents, target_datapath, transform, swizzle_tangents)
+        out_tangent = value - out_tangent
+
+    if value.shape[1] == 4 and get_target_property_name(target_datapath) != "value":
+        # Keep consecutive rotations in the same hemisphere, so that they interpolate the short way
+        signs = __quaternion_continuity_signs(value)
+        value *= signs
+        if in_tangent is not None:
+            in_tangent *= signs
+        if out_tangent is not None:
+            out_tangent *= signs
+
+    # build gltf control points: in tangent, value, out tangent for each keyframe
+    values = np.concatenate(
+        [gltf2_blender_math.array_to_gltf(a, target_datapath) for a in (in_tangent, value, out_tangent) if a is not None],
+        axis=1
+    ).astype(np.float32)
+
+    # store the keyframe data in a binary buffer
+    if get_target_property_name(target_datapath) == "value":
+        # channels with 'weight' targets must have scalar accessors
+        data_type = gltf2_io_constants.DataType.Scalar
+    else:
+        data_type = gltf2_io_constants.DataType.vec_type_from_num(value.shape[1])
+
+    accessor.buffer_view = gltf2_io_binary_data.BinaryData.from_array(values)
+    accessor.count = values.size // gltf2_io_constants.DataType.num_elements(data_type)
+    accessor.type = data_type
+
+
+def __keyframes_to_array(values: np.ndarray, target_datapath: str, transform: np.ndarray,
+                         swizzle_yup: bool) -> np.ndarray:
+    """Convert Blender keyframe values to glTF, like transform and swizzle_yup, on all keyframes at once."""
+    array = gltf2_blender_math.lists_to_array(values, target_datapath)
+    array = gltf2_blender_math.transform_array(array, target_datapath, transform)
+    if swizzle_yup:
+        array = gltf2_blender_math.swizzle_yup_array(array, target_datapath)
+    return array
+
+
+def __quaternion_continuity_signs(rotations: np.ndarray) -> np.ndarray:
+    """Get the (n, 1) signs flipping each rotation into the hemisphere of the previous (flipped) one."""
+    dots = np.einsum('ij,ij->i', rotations[1:], rotations[:-1])
+    flips = np.concatenate([[1.0], np.where(dots < 0.0, -1.0, 1.0)])
+    return np.cumprod(flips)[:, np.newaxis]
@@ -17,6 +17,7 @@ import typing
 
 from ...io.com import gltf2_io
 from . import gltf2_blender_gather_animation_channels
+from . import gltf2_blender_bake
 from ...io.com.gltf2_io_debug import print_console
 from ..com.gltf2_blender_extras import generate_extras
 from ...io.exp.gltf2_io_user_extensions import export_user_extensions
@@ -101,6 +102,107 @@ def gather_animations(blender_object: bpy.types.Object,
     return animations, tracks
 
 
+def bake_armature_actions(blender_objects: typing.List[bpy.types.Object],
+                          bake_store: gltf2_blender_bake.BakeStore,
+                          export_settings):
+    """
+    Bake the bones of all actions of all the armatures at once, before gathering their animations.
+
+    :param blender_objects: The exported blender objects
+    :param bake_store: Where to store the baked bone matrices and shape key driver values
+    :param export_settings:
+    """
+    scheduler = gltf2_blender_bake.BakeScheduler(export_settings)
+
+    for blender_object in blender_objects:
+        if blender_object.type != "ARMATURE":
+            continue
+        for blender_action, _, on_type in __get_blender_actions(blender_object, export_settings):
+            if on_type != "OBJECT" or not __filter_animation(blender_action, blender_object, export_settings):
+                continue
+            # Frames out of this range, if any, are baked on their own
+            ranges = [fcurve.range() for fcurve in blender_action.fcurves if len(fcurve.keyframe_points) != 0]
+            if len(ranges) == 0:
+                continue
+            scheduler.add(blender_object, blender_action, min([r[0] for r in ranges]), max([r[1] for r in ranges]))
+
+    scheduler.run(bake_store)
+
+
+def merge_animation_tracks(animations: typing.List[gltf2_io.Animation],
+                           tracks: typing.Dict[str, typing.List[int]],
+                           export_settings) -> typing.List[gltf2_io.Animation]:
+    """
+    Merge the animations of each track into the first one, named after the track.
+
+    Channels already animated in the merged animation are skipped, with their samplers. Sampler inputs with
+    the same time codes are then shared by all animations.
+
+    :param animations: The glTF2 animations of the scene
+    :param tracks: The indices in animations of the animations of each track
+    :param export_settings:
+    :return: The animations left after merging
+    """
+    to_delete_idx = set()
+    for track_name, animation_indices in tracks.items():
+        if len(animation_indices) < 2:
+
+            # There is only 1 animation in the track
+            # If name of the track is not a default name, use this name for action
+            if len(animation_indices) != 0:
+                animations[animation_indices[0]].name = track_name
+
+            continue
+
+        base_animation = animations[animation_indices[0]]
+        base_animation.name = track_name
+        already_animated = {(channel.target.node, channel.target.path) for channel in base_animation.channels}
+
+        for anim_idx in animation_indices[1:]:
+            to_delete_idx.add(anim_idx)
+            animation = animations[anim_idx]
+
+            # Merging extensions
+            # Provide a hook to handle extension merging since there is no way to know author intent
+            export_user_extensions('merge_animation_extensions_hook', export_settings, animation, base_animation)
+
+            # Merging extras
+            # Warning, some values can be overwritten if present in multiple merged animations
+            if animation.extras is not None:
+                if base_animation.extras is None:
+                    base_animation.extras = {}
+                base_animation.extras.update(animation.extras)
+
+            # Only the samplers of the merged channels are moved, once each
+            sampler_indices = {}
+            for channel in animation.channels:
+                if (channel.target.node, channel.target.path) in already_animated:
+                    print_console("WARNING", "Some strips have same channel animation ({}), on node {} !".format(channel.target.path, channel.target.node.name))
+                    continue
+                if channel.sampler not in sampler_indices:
+                    sampler_indices[channel.sampler] = len(base_animation.samplers)
+                    base_animation.samplers.append(animation.samplers[channel.sampler])
+                channel.sampler = sampler_indices[channel.sampler]
+                base_animation.channels.append(channel)
+                already_animated.add((channel.target.node, channel.target.path))
+
+    animations = [animation for idx, animation in enumerate(animations) if idx not in to_delete_idx]
+    __share_sampler_inputs(animations)
+    return animations
+
+
+def __share_sampler_inputs(animations: typing.List[gltf2_io.Animation]):
+    """Make samplers with the same time codes use the same input accessor, so that it is only written once."""
+    inputs = {}
+    for animation in animations:
+        for sampler in animation.samplers:
+            accessor = sampler.input
+            if accessor.buffer_view is None:
+                continue
+            key = (accessor.component_type, accessor.type, accessor.count, accessor.buffer_view)
+            sampler.input = inputs.setdefault(key, accessor)
+
+
 def __gather_animation(blender_action: bpy.types.Action,
                        blender_object: bpy.types.Object,
                        export_settings
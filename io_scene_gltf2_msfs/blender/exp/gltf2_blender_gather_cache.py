@@ -12,9 +12,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import functools
+import hashlib
+import typing
 import bpy
-from . import gltf2_blender_get
+import numpy as np
+
+from ...io.com.gltf2_io_debug import print_console
+
+# Key of the fingerprint of the export settings, in the export settings
+CACHE_FINGERPRINT = 'gltf_cache_fingerprint'
+
+# Datablocks are keyed by address, as names are only unique per library (or per armature for pose bones)
+__BY_POINTER = frozenset((bpy.types.Object, bpy.types.Scene, bpy.types.Material, bpy.types.Action, bpy.types.Mesh,
+                          bpy.types.PoseBone))
+
+# [hits, misses] of each cached function, by module and function name
+__cache_stats = {}
 
 
 def cached(func):
@@ -25,13 +40,15 @@ def cached(func):
     :param func: the function to be decorated. It will have a static __cache member afterwards
     :return:
     """
+    stats = __cache_stats.setdefault(func.__module__.rsplit('.', 1)[-1] + '.' + func.__qualname__, [0, 0])
+
     @functools.wraps(func)
     def wrapper_cached(*args, **kwargs):
         assert len(args) >= 2 and 0 <= len(kwargs) <= 1, "Wrong signature for cached function"
         cache_key_args = args
         # make a shallow copy of the keyword arguments so that 'export_settings' can be removed
         cache_key_kwargs = dict(kwargs)
-        if kwargs.get("export_settings"):
+        if "export_settings" in kwargs:
             export_settings = kwargs["export_settings"]
             # 'export_settings' should not be cached
             del cache_key_kwargs["export_settings"]
@@ -39,62 +56,181 @@ def cached(func):
             export_settings = args[-1]
             cache_key_args = args[:-1]
 
-        __by_name = [bpy.types.Object, bpy.types.Scene, bpy.types.Material, bpy.types.Action, bpy.types.Mesh, bpy.types.PoseBone]
-
         # we make a tuple from the function arguments so that they can be used as a key to the cache
-        cache_key = ()
-        for i in cache_key_args:
-            if type(i) in __by_name:
-                cache_key += (i.name,)
-            else:
-                cache_key += (i,)
-        for i in cache_key_kwargs.values():
-            if type(i) in __by_name:
-                cache_key += (i.name,)
-            else:
-                cache_key += (i,)
+        cache_key = tuple(__get_cache_key(i) for i in cache_key_args) + \
+            tuple(__get_cache_key(i) for i in cache_key_kwargs.values())
 
         # invalidate cache if export settings have changed
-        if not hasattr(func, "__export_settings") or export_settings != func.__export_settings:
+        fingerprint = get_settings_fingerprint(export_settings)
+        if not hasattr(func, "__fingerprint") or fingerprint != func.__fingerprint:
             func.__cache = {}
-            func.__export_settings = export_settings
+            func.__fingerprint = fingerprint
         # use or fill cache
         if cache_key in func.__cache:
+            stats[0] += 1
             return func.__cache[cache_key]
         else:
-            result = func(*args)
+            stats[1] += 1
+            result = func(*args, **kwargs)
             func.__cache[cache_key] = result
             return result
     return wrapper_cached
 
-def bonecache(func):
 
-    def reset_cache_bonecache():
-        func.__current_action_name = None
-        func.__current_armature_name = None
-        func.__bonecache = {}
+def __get_cache_key(arg):
+    if type(arg) in __BY_POINTER:
+        return type(arg), arg.as_pointer(), arg.name
+    return arg
 
-    func.reset_cache = reset_cache_bonecache
 
-    @functools.wraps(func)
-    def wrapper_bonecache(*args, **kwargs):
-        if args[2] is None:
-            pose_bone_if_armature = gltf2_blender_get.get_object_from_datapath(args[0],
-                                                                args[1][0].data_path)
-        else:
-            pose_bone_if_armature = args[0].pose.bones[args[2]]
+def get_settings_fingerprint(export_settings) -> bytes:
+    """Get the fingerprint of the export settings, computing it if it wasn't yet."""
+    fingerprint = export_settings.get(CACHE_FINGERPRINT)
+    if fingerprint is None:
+        fingerprint = set_settings_fingerprint(export_settings)
+    return fingerprint
+
+
+def set_settings_fingerprint(export_settings) -> bytes:
+    """
+    Hash the export settings, once per export, so that cached functions tell exports apart in one comparison.
+
+    Values are hashed by value, except objects that don't compare by value, hashed by identity. The settings
+    changed during the export, such as the bake store, aren't hashed again: they don't start another export.
+    """
+    items = sorted((key, __get_fingerprint_value(value))
+                   for key, value in export_settings.items() if key != CACHE_FINGERPRINT)
+    fingerprint = hashlib.blake2b(repr(items).encode(), digest_size=16).digest()
+    export_settings[CACHE_FINGERPRINT] = fingerprint
+    return fingerprint
+
+
+def __get_fingerprint_value(value):
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__, tuple(__get_fingerprint_value(v) for v in value)
+    if isinstance(value, dict):
+        return 'dict', tuple(sorted(((repr(k), __get_fingerprint_value(v)) for k, v in value.items()), key=repr))
+    if type(value).__eq__ is object.__eq__:
+        return 'id', type(value).__name__, id(value)
+    return type(value).__name__, repr(value)
+
+
+def get_cache_stats() -> typing.Dict[str, typing.Tuple[int, int]]:
+    """Get the (hits, misses) of each cached function, since the last reset."""
+    return {name: (hits, misses) for name, (hits, misses) in __cache_stats.items()}
+
+
+def reset_cache_stats():
+    for stats in __cache_stats.values():
+        stats[0] = 0
+        stats[1] = 0
+
+
+def print_cache_stats():
+    """Print the hits and misses of the cached functions that were called since the last reset."""
+    for name, (hits, misses) in sorted(__cache_stats.items()):
+        if hits + misses > 0:
+            print_console('PROFILE', 'Cache {}: {} hits, {} misses'.format(name, hits, misses))
+
+class BakedBoneMatrices:
+    """
+    The bone matrices of an armature baked over the frames of an action.
+
+    Matrices are stored in a contiguous float32 (frames, bones, 4, 4) array, indexed by frame and bone name.
+    """
+
+    def __init__(self, frames: typing.Sequence[float], bone_names: typing.Sequence[str]):
+        self.frame_index = {frame: i for i, frame in enumerate(frames)}
+        self.bone_index = {bone_name: i for i, bone_name in enumerate(bone_names)}
+        self.matrices = np.empty((len(frames), len(bone_names), 4, 4), dtype=np.float32)
+
+    def has_frames(self, frames: typing.Iterable[float]) -> bool:
+        return all(frame in self.frame_index for frame in frames)
+
+    def set_frame(self, frame: float, matrices: typing.Iterable):
+        """Set the matrices of all bones, in bone index order, at this frame."""
+        self.matrices[self.frame_index[frame]] = np.array(matrices, dtype=np.float32).reshape(-1, 4, 4)
+
+    def get_bone(self, bone_name: str, frames: typing.Sequence[float]) -> np.ndarray:
+        """Get the (len(frames), 4, 4) matrices of the bone at these frames."""
+        frame_indices = [self.frame_index[frame] for frame in frames]
+        return self.matrices[frame_indices, self.bone_index[bone_name]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrices.nbytes
+
+
+class BakedDriverValues:
+    """
+    The values of the shape keys of an object, driven by an armature, baked over the frames of an action.
+
+    Values are stored in a float32 (frames, shape keys) array, indexed by frame. Shape keys are in the order
+    of their driver fcurves.
+    """
+
+    def __init__(self, frames: typing.Sequence[float], shape_key_count: int):
+        self.frame_index = {frame: i for i, frame in enumerate(frames)}
+        self.values = np.zeros((len(frames), shape_key_count), dtype=np.float32)
+
+    def has_frames(self, frames: typing.Iterable[float]) -> bool:
+        return all(frame in self.frame_index for frame in frames)
+
+    def set_frame(self, frame: float, values: typing.Sequence[float]):
+        self.values[self.frame_index[frame]] = values
+
+    def get(self, frames: typing.Sequence[float]) -> np.ndarray:
+        """Get the (len(frames), shape keys) values at these frames."""
+        return self.values[[self.frame_index[frame] for frame in frames]]
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+
+class BakeCache:
+    """
+    Baked bone matrices and driver values of several armatures and actions, within a memory budget.
+
+    When adding an entry would exceed the budget, the least recently used ones are evicted.
+    The last added entry is always kept, even if it exceeds the budget on its own.
+    """
+
+    def __init__(self, budget: int):
+        self.__budget = budget
+        self.__entries = collections.OrderedDict()
+        self.__nbytes = 0
+
+    def get(self, key) -> typing.Union[BakedBoneMatrices, BakedDriverValues, None]:
+        entry = self.__entries.get(key)
+        if entry is not None:
+            self.__entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry: typing.Union[BakedBoneMatrices, BakedDriverValues]):
+        self.pop(key)
+        self.__entries[key] = entry
+        self.__nbytes += entry.nbytes
+        while self.__nbytes > self.__budget and len(self.__entries) > 1:
+            _, evicted = self.__entries.popitem(last=False)
+            self.__nbytes -= evicted.nbytes
+
+    def pop(self, key) -> typing.Union[BakedBoneMatrices, BakedDriverValues, None]:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__nbytes -= entry.nbytes
+        return entry
+
+    def clear(self):
+        self.__entries.clear()
+        self.__nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.__nbytes
 
-        if not hasattr(func, "__current_action_name"):
-            func.reset_cache()
-        if args[6] != func.__current_action_name or args[0] != func.__current_armature_name:
-            result = func(*args)
-            func.__bonecache = result
-            func.__current_action_name = args[6]
-            func.__current_armature_name = args[0]
-            return result[args[7]][pose_bone_if_armature.name]
-        else:
-            return func.__bonecache[args[7]][pose_bone_if_armature.name]
-    return wrapper_bonecache
 
 # TODO: replace "cached" with "unique" in all cases where the caching is functional and not only for performance reasons
 call_or_fetch = cached
@@ -121,25 +257,3 @@ def skdriverdiscovercache(func):
         else:
             return func.__skdriverdiscover[args[0]]
     return wrapper_skdriverdiscover
-
-def skdrivervalues(func):
-
-    def reset_cache_skdrivervalues():
-        func.__skdrivervalues = {}
-
-    func.reset_cache = reset_cache_skdrivervalues
-
-    @functools.wraps(func)
-    def wrapper_skdrivervalues(*args, **kwargs):
-        if not hasattr(func, "__skdrivervalues") or func.__skdrivervalues is None:
-            func.reset_cache()
-
-        if args[0].name not in func.__skdrivervalues.keys():
-            func.__skdrivervalues[args[0].name] = {}
-        if args[1] not in func.__skdrivervalues[args[0].name]:
-            vals = func(*args)
-            func.__skdrivervalues[args[0].name][args[1]] = vals
-            return vals
-        else:
-            return func.__skdrivervalues[args[0].name][args[1]]
-    return wrapper_skdrivervalues
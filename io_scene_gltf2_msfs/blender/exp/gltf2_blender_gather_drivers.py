@@ -13,7 +13,7 @@
 # limitations under the License.
 
 
-from .gltf2_blender_gather_cache import skdriverdiscovercache, skdrivervalues
+from .gltf2_blender_gather_cache import skdriverdiscovercache
 from ..com.gltf2_blender_data_path import get_target_object_path
 
 
@@ -78,8 +78,8 @@ def get_sk_drivers(blender_armature):
 
     return tuple(drivers)
 
-@skdrivervalues
-def get_sk_driver_values(blender_object, frame, fcurves):
+def evaluate_sk_driver_values(blender_object, fcurves):
+    """Read the current (driven) values of the shape keys, without caching them."""
     sk_values = []
     for f in [f for f in fcurves if f is not None]:
         sk_values.append(blender_object.data.shape_keys.path_resolve(get_target_object_path(f.data_path)).value)
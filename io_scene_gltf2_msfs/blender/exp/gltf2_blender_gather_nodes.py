@@ -18,7 +18,7 @@ from mathutils import Matrix, Quaternion, Vector
 
 from . import gltf2_blender_export_keys
 from ..com import gltf2_blender_math
-from .gltf2_blender_gather_cache import cached
+from .gltf2_blender_gather_cache import cached, get_settings_fingerprint
 from . import gltf2_blender_gather_skins
 from . import gltf2_blender_gather_cameras
 from . import gltf2_blender_gather_mesh
@@ -37,9 +37,10 @@ def gather_node(blender_object, library, blender_scene, dupli_object_parent, exp
     # with blender_scene=None
 
     # invalidate cache if export settings have changed
-    if not hasattr(gather_node, "__export_settings") or export_settings != gather_node.__export_settings:
+    fingerprint = get_settings_fingerprint(export_settings)
+    if not hasattr(gather_node, "__fingerprint") or fingerprint != gather_node.__fingerprint:
         gather_node.__cache = {}
-        gather_node.__export_settings = export_settings
+        gather_node.__fingerprint = fingerprint
 
     if blender_scene is None and (blender_object.name, library) in gather_node.__cache:
         return gather_node.__cache[(blender_object.name, library)]
@@ -48,6 +49,13 @@ def gather_node(blender_object, library, blender_scene, dupli_object_parent, exp
     gather_node.__cache[(blender_object.name, library)] = node
     return node
 
+
+def get_gathered_node(blender_object, library, export_settings):
+    """Get the node already gathered for the object with these export settings, without gathering it."""
+    if not hasattr(gather_node, "__fingerprint") or get_settings_fingerprint(export_settings) != gather_node.__fingerprint:
+        return None
+    return gather_node.__cache.get((blender_object.name, library))
+
 @cached
 def __gather_node(blender_object, library, blender_scene, dupli_object_parent, export_settings):
 
@@ -79,7 +79,7 @@ def array_to_accessor(array, component_type, data_type, include_max_and_min=Fals
         amin = np.amin(array, axis=0).tolist()
 
     return gltf2_io.Accessor(
-        buffer_view=gltf2_io_binary_data.BinaryData(array.tobytes()),
+        buffer_view=gltf2_io_binary_data.BinaryData.from_array(array),
         byte_offset=None,
         component_type=component_type,
         count=len(array),
@@ -188,7 +188,7 @@ def __gather_colors(blender_primitive, export_settings):
             colors = colors.astype(np.uint16)
 
             attributes[color_id] = gltf2_io.Accessor(
-                buffer_view=gltf2_io_binary_data.BinaryData(colors.tobytes()),
+                buffer_view=gltf2_io_binary_data.BinaryData.from_array(colors),
                 byte_offset=None,
                 component_type=gltf2_io_constants.ComponentType.UnsignedShort,
                 count=len(colors),
@@ -212,7 +212,8 @@ def __gather_skins(blender_primitive, export_settings):
         bone_set_index = 0
         joint_id = 'JOINTS_' + str(bone_set_index)
         weight_id = 'WEIGHTS_' + str(bone_set_index)
-        while blender_primitive["attributes"].get(joint_id) and blender_primitive["attributes"].get(weight_id):
+        while blender_primitive["attributes"].get(joint_id) is not None and \
+                blender_primitive["attributes"].get(weight_id) is not None:
             if bone_set_index >= 1:
                 if not export_settings['gltf_all_vertex_influences']:
                     gltf2_io_debug.print_console("WARNING", "There are more than 4 joint vertex influences."
@@ -220,36 +221,71 @@ def __gather_skins(blender_primitive, export_settings):
                     break
 
             # joints
-            internal_joint = blender_primitive["attributes"][joint_id]
+            internal_joint = __as_vec4_array(blender_primitive["attributes"][joint_id], np.uint32)
             component_type = gltf2_io_constants.ComponentType.UnsignedShort
-            if max(internal_joint) < 256:
+            if len(internal_joint) == 0 or internal_joint.max() < 256:
                 component_type = gltf2_io_constants.ComponentType.UnsignedByte
             joint = array_to_accessor(
-                internal_joint,
+                internal_joint.astype(gltf2_io_constants.ComponentType.to_numpy_dtype(component_type)),
                 component_type,
                 data_type=gltf2_io_constants.DataType.Vec4,
             )
             attributes[joint_id] = joint
 
             # weights
-            internal_weight = blender_primitive["attributes"][weight_id]
+            internal_weight = __as_vec4_array(blender_primitive["attributes"][weight_id], np.float32)
             # normalize first 4 weights, when not exporting all influences
-            if not export_settings['gltf_all_vertex_influences']:
-                for idx in range(0, len(internal_weight), 4):
-                    weight_slice = internal_weight[idx:idx + 4]
-                    total = sum(weight_slice)
-                    if total > 0:
-                        factor = 1.0 / total
-                        internal_weight[idx:idx + 4] = [w * factor for w in weight_slice]
-
-            weight = array_to_accessor(
-                internal_weight,
-                component_type=gltf2_io_constants.ComponentType.Float,
-                data_type=gltf2_io_constants.DataType.Vec4,
-            )
-            attributes[weight_id] = weight
+            normalized = not export_settings['gltf_all_vertex_influences']
+            if normalized:
+                totals = internal_weight.sum(axis=1, keepdims=True)
+                internal_weight = np.divide(internal_weight, totals, out=internal_weight.copy(), where=totals > 0)
+
+            attributes[weight_id] = __weights_to_accessor(internal_weight, normalized, export_settings)
 
             bone_set_index += 1
             joint_id = 'JOINTS_' + str(bone_set_index)
             weight_id = 'WEIGHTS_' + str(bone_set_index)
     return attributes
+
+
+def __as_vec4_array(values, dtype):
+    """Joints and weights come as (n, 4) arrays, or as flat lists."""
+    array = np.asarray(values, dtype=dtype)
+    return array.reshape(len(array.reshape(-1)) // 4, 4)
+
+
+def __weights_to_accessor(weights, normalized, export_settings):
+    """Weights are floats, or normalized unsigned bytes/shorts, depending on the export settings."""
+    weights_format = export_settings['gltf_weights_format']
+    if weights_format == 'FLOAT':
+        return array_to_accessor(
+            weights,
+            component_type=gltf2_io_constants.ComponentType.Float,
+            data_type=gltf2_io_constants.DataType.Vec4,
+        )
+
+    if weights_format == 'UNSIGNED_BYTE':
+        component_type = gltf2_io_constants.ComponentType.UnsignedByte
+    else:
+        component_type = gltf2_io_constants.ComponentType.UnsignedShort
+    dtype = gltf2_io_constants.ComponentType.to_numpy_dtype(component_type)
+    max_value = np.iinfo(dtype).max
+
+    quantized = np.clip(weights, 0.0, 1.0) * max_value
+    quantized += 0.5  # bias for rounding
+    quantized = quantized.astype(dtype)
+
+    if normalized:
+        # Rounding may break the sum: give the difference to the largest (first) weight of each vertex
+        sums = quantized.sum(axis=1, dtype=np.int64)
+        has_weight = sums > 0
+        first = quantized[has_weight, 0].astype(np.int64) + (max_value - sums[has_weight])
+        quantized[has_weight, 0] = np.clip(first, 0, max_value)
+
+    accessor = array_to_accessor(
+        quantized,
+        component_type=component_type,
+        data_type=gltf2_io_constants.DataType.Vec4,
+    )
+    accessor.normalized = True
+    return accessor
@@ -19,10 +19,11 @@ import numpy as np
 from .gltf2_blender_export_keys import NORMALS, MORPH_NORMAL, TANGENTS, MORPH_TANGENT, MORPH
 
 from .gltf2_blender_gather_cache import cached
-from . import gltf2_blender_extract
+from . import gltf2_blender_mesh_cache
 from . import gltf2_blender_gather_accessors
 from . import gltf2_blender_gather_primitive_attributes
 from . import gltf2_blender_gather_materials
+from . import gltf2_blender_vertex_cache
 
 from ...io.com import gltf2_io
 from ...io.exp import gltf2_io_binary_data
@@ -95,8 +96,17 @@ def __gather_cache_primitives(
     """
     primitives = []
 
-    blender_primitives = gltf2_blender_extract.extract_primitives(
-        None, blender_mesh, library, blender_object, vertex_groups, modifiers, export_settings)
+    blender_primitives = gltf2_blender_mesh_cache.extract_primitives(
+        blender_mesh, library, blender_object, vertex_groups, modifiers, export_settings)
+
+    if export_settings['gltf_optimize_vertex_cache']:
+        for primitive_idx, internal_primitive in enumerate(blender_primitives):
+            # Only triangles
+            if internal_primitive.get('mode') is not None or internal_primitive.get('indices') is None:
+                continue
+            acmr_before, acmr_after = gltf2_blender_vertex_cache.optimize_primitive(internal_primitive)
+            print_console('INFO', 'Mesh {} primitive {}: ACMR {:.3f} -> {:.3f}'.format(
+                blender_mesh.name, primitive_idx, acmr_before, acmr_after))
 
     for internal_primitive in blender_primitives:
         primitive = {
@@ -133,7 +143,7 @@ def __gather_indices(blender_primitive, blender_mesh, modifiers, export_settings
         return None
 
     element_type = gltf2_io_constants.DataType.Scalar
-    binary_data = gltf2_io_binary_data.BinaryData(indices.tobytes())
+    binary_data = gltf2_io_binary_data.BinaryData.from_array(indices)
     return gltf2_blender_gather_accessors.gather_accessor(
         binary_data,
         component_type,
@@ -44,6 +44,40 @@ class GlTF2Exporter:
     Any child properties are replaced with references where necessary
     """
 
+    # Fields of each glTF property class that can hold other properties, binary/image data or extensions.
+    # Other fields only hold primitives and are never visited.
+    __CHILD_FIELDS = {
+        gltf2_io.Accessor: ('buffer_view', 'sparse', 'extensions', 'extras'),
+        gltf2_io.AccessorSparse: ('indices', 'values', 'extensions', 'extras'),
+        gltf2_io.AccessorSparseIndices: ('buffer_view', 'extensions', 'extras'),
+        gltf2_io.AccessorSparseValues: ('buffer_view', 'extensions', 'extras'),
+        gltf2_io.Animation: ('channels', 'samplers', 'extensions', 'extras'),
+        gltf2_io.AnimationChannel: ('target', 'extensions', 'extras'),
+        gltf2_io.AnimationChannelTarget: ('node', 'extensions', 'extras'),
+        gltf2_io.AnimationSampler: ('input', 'output', 'extensions', 'extras'),
+        gltf2_io.Asset: ('extensions', 'extras'),
+        gltf2_io.Buffer: ('extensions', 'extras'),
+        gltf2_io.BufferView: ('extensions', 'extras'),
+        gltf2_io.Camera: ('orthographic', 'perspective', 'extensions', 'extras'),
+        gltf2_io.CameraOrthographic: ('extensions', 'extras'),
+        gltf2_io.CameraPerspective: ('extensions', 'extras'),
+        gltf2_io.Image: ('buffer_view', 'uri', 'extensions', 'extras'),
+        gltf2_io.Material: ('pbr_metallic_roughness', 'normal_texture', 'occlusion_texture', 'emissive_texture',
+                            'extensions', 'extras'),
+        gltf2_io.MaterialNormalTextureInfoClass: ('index', 'extensions', 'extras'),
+        gltf2_io.MaterialOcclusionTextureInfoClass: ('index', 'extensions', 'extras'),
+        gltf2_io.MaterialPBRMetallicRoughness: ('base_color_texture', 'metallic_roughness_texture',
+                                                'extensions', 'extras'),
+        gltf2_io.Mesh: ('primitives', 'extensions', 'extras'),
+        gltf2_io.MeshPrimitive: ('attributes', 'indices', 'material', 'targets', 'extensions', 'extras'),
+        gltf2_io.Node: ('camera', 'children', 'mesh', 'skin', 'extensions', 'extras'),
+        gltf2_io.Sampler: ('extensions', 'extras'),
+        gltf2_io.Scene: ('nodes', 'extensions', 'extras'),
+        gltf2_io.Skin: ('inverse_bind_matrices', 'joints', 'skeleton', 'extensions', 'extras'),
+        gltf2_io.Texture: ('sampler', 'source', 'extensions', 'extras'),
+        gltf2_io.TextureInfo: ('index', 'extensions', 'extras'),
+    }
+
     def __init__(self, export_settings):
         self.export_settings = export_settings
         self.__finalized = False
@@ -83,6 +117,8 @@ class GlTF2Exporter:
 
         self.__buffer = gltf2_io_buffer.Buffer()
         self.__images = {}
+        # per root list (by id), index of its elements by unique key, see __append_unique_and_get_index
+        self.__unique_indices = {}
 
         # mapping of all glTFChildOfRootProperty types to their corresponding root level arrays
         self.__childOfRootPropertyTypeLookup = {
@@ -101,23 +137,6 @@ class GlTF2Exporter:
             gltf2_io.Texture: self.__gltf.textures
         }
 
-        self.__propertyTypeLookup = [
-            gltf2_io.AccessorSparseIndices,
-            gltf2_io.AccessorSparse,
-            gltf2_io.AccessorSparseValues,
-            gltf2_io.AnimationChannel,
-            gltf2_io.AnimationChannelTarget,
-            gltf2_io.AnimationSampler,
-            gltf2_io.Asset,
-            gltf2_io.CameraOrthographic,
-            gltf2_io.CameraPerspective,
-            gltf2_io.MeshPrimitive,
-            gltf2_io.TextureInfo,
-            gltf2_io.MaterialPBRMetallicRoughness,
-            gltf2_io.MaterialNormalTextureInfoClass,
-            gltf2_io.MaterialOcclusionTextureInfoClass
-        ]
-
         self.__traverse(asset)
 
     @property
@@ -136,7 +155,7 @@ class GlTF2Exporter:
                 uri = None
             elif output_path and buffer_name:
                 with open(output_path + buffer_name, 'wb') as f:
-                    f.write(self.__buffer.to_bytes())
+                    self.__buffer.write_to(f)
                 uri = buffer_name
             else:
                 uri = self.__buffer.to_embed_string()
@@ -153,7 +172,8 @@ class GlTF2Exporter:
         self.__finalized = True
 
         if is_glb:
-            return self.__buffer.to_bytes()
+            # returned as is, the GLB writer streams it into the BIN chunk
+            return self.__buffer
 
     def add_draco_extension(self):
         """
@@ -161,8 +181,8 @@ class GlTF2Exporter:
 
         :return:
         """
-        self.__gltf.extensions_required.append('KHR_draco_mesh_compression')
-        self.__gltf.extensions_used.append('KHR_draco_mesh_compression')
+        self.__append_unique_and_get_index(self.__gltf.extensions_required, 'KHR_draco_mesh_compression')
+        self.__append_unique_and_get_index(self.__gltf.extensions_used, 'KHR_draco_mesh_compression')
 
     def finalize_images(self):
         """
@@ -173,10 +193,16 @@ class GlTF2Exporter:
         if self.__images:
             os.makedirs(output_path, exist_ok=True)
 
+        cache = self.export_settings['gltf_image_cache']
         for name, image in self.__images.items():
             dst_path = output_path + "/" + name + image.file_extension
+            if cache is not None and cache.is_written(dst_path, image.data):
+                # identical file already there (e.g. written by a previous lod)
+                continue
             with open(dst_path, 'wb') as f:
                 f.write(image.data)
+            if cache is not None:
+                cache.mark_written(dst_path, image.data)
 
     def add_scene(self, scene: gltf2_io.Scene, active: bool = False):
         """
@@ -223,15 +249,32 @@ class GlTF2Exporter:
 
         return self.__append_unique_and_get_index(gltf_list, property)
 
-    @staticmethod
-    def __append_unique_and_get_index(target: list, obj):
-        if obj in target:
-            return target.index(obj)
-        else:
+    def __append_unique_and_get_index(self, target: list, obj):
+        """
+        Append obj to target, unless it is already in there, and return its index.
+
+        Lookups go through a dict per target list, so they don't scan the list.
+        """
+        key = _unique_key(obj)
+        if key is None:
+            # not hashable, even structurally
+            if obj in target:
+                return target.index(obj)
             index = len(target)
             target.append(obj)
             return index
 
+        indices = self.__unique_indices.get(id(target))
+        if indices is None:
+            indices = self.__unique_indices[id(target)] = {}
+
+        index = indices.get(key)
+        if index is None:
+            index = len(target)
+            target.append(obj)
+            indices[key] = index
+        return index
+
     def __add_image(self, image: gltf2_io_image_data.ImageData):
         name = image.adjusted_name()
         count = 1
@@ -282,40 +325,39 @@ class GlTF2Exporter:
 
         The tree is traversed downwards until a primitive is reached. Then any ChildOfRoot property
         is stored in the according list in the glTF and replaced with a index reference in the upper level.
+        Properties are visited through their reference bearing fields only, as declared in __CHILD_FIELDS.
         """
-        def __traverse_property(node):
-            for member_name in [a for a in dir(node) if not a.startswith('__') and not callable(getattr(node, a))]:
-                new_value = self.__traverse(getattr(node, member_name))
-                setattr(node, member_name, new_value)  # usually this is the same as before
-
-                # # TODO: maybe with extensions hooks we can find a more elegant solution
-                # if member_name == "extensions" and new_value is not None:
-                #     for extension_name in new_value.keys():
-                #         self.__append_unique_and_get_index(self.__gltf.extensions_used, extension_name)
-                #         self.__append_unique_and_get_index(self.__gltf.extensions_required, extension_name)
+        node_type = type(node)
+
+        # primitives (and None) are the leaves of the graph, nothing to do
+        if node_type in _LEAF_TYPES:
             return node
 
         # traverse nodes of a child of root property type and add them to the glTF root
-        if type(node) in self.__childOfRootPropertyTypeLookup:
-            node = __traverse_property(node)
-            idx = self.__to_reference(node)
+        gltf_list = self.__childOfRootPropertyTypeLookup.get(node_type)
+        if gltf_list is not None:
+            self.__traverse_property(node, self.__CHILD_FIELDS[node_type])
             # child of root properties are only present at root level --> replace with index in upper level
-            return idx
+            return self.__append_unique_and_get_index(gltf_list, node)
 
         # traverse lists, such as children and replace them with indices
         if isinstance(node, list):
-            for i in range(len(node)):
-                node[i] = self.__traverse(node[i])
+            for i, value in enumerate(node):
+                if type(value) not in _LEAF_TYPES:
+                    node[i] = self.__traverse(value)
             return node
 
         if isinstance(node, dict):
-            for key in node.keys():
-                node[key] = self.__traverse(node[key])
+            for key, value in node.items():
+                if type(value) not in _LEAF_TYPES:
+                    node[key] = self.__traverse(value)
             return node
 
         # traverse into any other property
-        if type(node) in self.__propertyTypeLookup:
-            return __traverse_property(node)
+        fields = self.__CHILD_FIELDS.get(node_type)
+        if fields is not None:
+            self.__traverse_property(node, fields)
+            return node
 
         # binary data needs to be moved to a buffer and referenced with a buffer view
         if isinstance(node, gltf2_io_binary_data.BinaryData):
@@ -346,6 +388,45 @@ class GlTF2Exporter:
         # do nothing for any type that does not match a glTF schema (primitives)
         return node
 
+    def __traverse_property(self, node, fields):
+        for field in fields:
+            value = getattr(node, field)
+            if type(value) in _LEAF_TYPES:
+                continue
+            new_value = self.__traverse(value)
+            if new_value is not value:
+                setattr(node, field, new_value)
+
+
+# types that never hold references, the traversal stops there
+_LEAF_TYPES = frozenset((type(None), bool, int, float, str))
+
+
+def _unique_key(obj):
+    """
+    Key under which obj is deduplicated in a root list.
+
+    Objects without value equality (all glTF properties) are keyed by identity, as `in` would compare them.
+    Other objects (extension names, root extension dicts) are keyed by a hashable form of their value.
+    Returns None if there is no such form.
+    """
+    if type(obj).__eq__ is object.__eq__:
+        return ('id', id(obj))
+    try:
+        key = _structural_key(obj)
+        hash(key)
+    except TypeError:
+        return None
+    return ('value', key)
+
+
+def _structural_key(value):
+    if isinstance(value, dict):
+        return ('dict', frozenset((k, _structural_key(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return ('list', tuple(_structural_key(v) for v in value))
+    return value
+
 def _path_to_uri(path):
     path = os.path.normpath(path)
     path = path.replace(os.sep, '/')
@@ -14,6 +14,7 @@
 
 import bpy
 import os
+import hashlib
 from typing import Optional, Tuple
 import numpy as np
 import tempfile
@@ -114,6 +115,17 @@ class ExportImage:
             len(set(fill.image.name for fill in self.fills.values())) == 1
         )
 
+    def cache_key(self, mime_type: Optional[str]) -> tuple:
+        """Key identifying the encoded result: source images, fills layout, mime type and dirty state."""
+        fills = []
+        for dst_chan, fill in sorted(self.fills.items()):
+            if isinstance(fill, FillImage):
+                fills.append((int(dst_chan), fill.image.as_pointer(), int(fill.src_chan), fill.image.is_dirty))
+            else:
+                fills.append((int(dst_chan), None, None, None))
+        original = self.original.as_pointer() if self.original is not None else None
+        return (tuple(fills), original, mime_type)
+
     def encode(self, mime_type: Optional[str]) -> bytes:
         self.file_format = {
             "image/jpeg": "JPEG",
@@ -214,6 +226,59 @@ class ExportImage:
             return _encode_temp_image(tmp_image, self.file_format)
 
 
+class ExportImageCache:
+    """Session cache of encoded images.
+
+    It is shared by all the exporters of one export session (e.g. all lods of a batch export),
+    so that an image used by several lods is encoded once, and written to disk once.
+    Encoded data is stored by content digest, so identical results of different keys share memory.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.__digests = {}  # cache key -> digest
+        self.__data = {}  # digest -> encoded bytes
+        self.__digests_by_data = {}  # id of cached bytes -> digest (cached bytes are kept alive)
+        self.__written = {}  # file path -> digest of the data written in this session
+
+    def encode(self, export_image: ExportImage, mime_type: Optional[str]) -> bytes:
+        key = export_image.cache_key(mime_type)
+        digest = self.__digests.get(key)
+        if digest is not None:
+            return self.__data[digest]
+
+        data = export_image.encode(mime_type)
+        digest = hashlib.sha1(data).hexdigest()
+        data = self.__data.setdefault(digest, data)
+        self.__digests[key] = digest
+        self.__digests_by_data[id(data)] = digest
+        return data
+
+    def digest(self, data: bytes) -> str:
+        digest = self.__digests_by_data.get(id(data))
+        if digest is None or self.__data.get(digest) is not data:
+            digest = hashlib.sha1(data).hexdigest()
+        return digest
+
+    def is_written(self, path: str, data: bytes) -> bool:
+        """Check if the file at path already holds data, either written in this session or present on disk."""
+        digest = self.digest(data)
+        if self.__written.get(path) == digest:
+            return True
+        if not os.path.isfile(path) or os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as f:
+            if f.read() != data:
+                return False
+        self.__written[path] = digest
+        return True
+
+    def mark_written(self, path: str, data: bytes):
+        self.__written[path] = self.digest(data)
+
+
 def _encode_temp_image(tmp_image: bpy.types.Image, file_format: str) -> bytes:
     with tempfile.TemporaryDirectory() as tmpdirname:
         tmpfilename = tmpdirname + '/img'
@@ -0,0 +1,264 @@
+# Copyright 2018-2021 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import typing
+
+import bpy
+import numpy as np
+
+from . import gltf2_blender_export_keys
+from . import gltf2_blender_extract
+from ...io.com.gltf2_io_debug import print_console
+
+# Bump when the output of extract_primitives changes, to invalidate the existing caches
+CACHE_VERSION = 1
+
+# Export settings the output of extract_primitives depends on
+__EXTRACT_SETTINGS = (
+    gltf2_blender_export_keys.YUP,
+    gltf2_blender_export_keys.NORMALS,
+    gltf2_blender_export_keys.TANGENTS,
+    gltf2_blender_export_keys.TEX_COORDS,
+    gltf2_blender_export_keys.COLORS,
+    gltf2_blender_export_keys.SKINS,
+    gltf2_blender_export_keys.MORPH,
+    gltf2_blender_export_keys.MORPH_NORMAL,
+    gltf2_blender_export_keys.MORPH_TANGENT,
+    gltf2_blender_export_keys.MATERIALS,
+    'gltf_loose_edges',
+    'gltf_loose_points',
+    'gltf_morph_tangent_vectorized',
+)
+
+__META_FILENAME = 'primitives.json'
+
+# Age in seconds after which a temporary directory is considered left by a crashed export
+__STALE_TEMP_AGE = 3600
+
+
+def extract_primitives(blender_mesh, library, blender_object, blender_vertex_groups, modifiers, export_settings
+                       ) -> typing.List[dict]:
+    """
+    Extract the primitives of a mesh, or load them from the on disk cache if the mesh was extracted before.
+
+    Entries are keyed by a hash of the mesh data and of the export settings extraction depends on. Their arrays
+    are stored as .npy files, loaded memory mapped. The cache is a directory next to the .blend file, kept
+    within a size limit by evicting the least recently used entries.
+    """
+    cache_directory = __get_cache_directory(export_settings)
+    if cache_directory is None:
+        return gltf2_blender_extract.extract_primitives(
+            None, blender_mesh, library, blender_object, blender_vertex_groups, modifiers, export_settings)
+
+    key = __hash_mesh(blender_mesh, blender_object, blender_vertex_groups, modifiers, export_settings)
+    entry_directory = os.path.join(cache_directory, key)
+    # Entries used by this export may still be memory mapped, they must not be evicted
+    export_settings['gltf_mesh_cache_keys'].add(key)
+    primitives = __load_entry(entry_directory)
+    if primitives is not None:
+        print_console('INFO', 'Loaded cached primitives: ' + blender_mesh.name)
+        return primitives
+
+    primitives = gltf2_blender_extract.extract_primitives(
+        None, blender_mesh, library, blender_object, blender_vertex_groups, modifiers, export_settings)
+    try:
+        __store_entry(cache_directory, entry_directory, primitives)
+        __evict(cache_directory, export_settings['gltf_mesh_cache_size'] * 1024 * 1024,
+                export_settings['gltf_mesh_cache_keys'])
+    except OSError as error:
+        print_console('WARNING', 'Could not store primitives of {} in the mesh cache: {}'.format(blender_mesh.name, error))
+    return primitives
+
+
+def __get_cache_directory(export_settings) -> typing.Optional[str]:
+    if not export_settings['gltf_mesh_cache']:
+        return None
+    if not bpy.data.filepath:
+        # The cache lives next to the .blend file
+        print_console('WARNING', 'The mesh cache is only used once the .blend file is saved')
+        return None
+    blend_directory, blend_filename = os.path.split(bpy.data.filepath)
+    return os.path.join(blend_directory, os.path.splitext(blend_filename)[0] + '_gltf_mesh_cache')
+
+
+def __hash_mesh(blender_mesh, blender_object, blender_vertex_groups, modifiers, export_settings) -> str:
+    """Hash everything the primitives extracted from the mesh depend on."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(repr((CACHE_VERSION, [export_settings[key] for key in __EXTRACT_SETTINGS])).encode())
+
+    __hash_foreach(h, blender_mesh.vertices, 'co', np.float32, 3)
+    __hash_foreach(h, blender_mesh.edges, 'vertices', np.uint32, 2)
+    __hash_foreach(h, blender_mesh.loops, 'vertex_index', np.uint32)
+    __hash_foreach(h, blender_mesh.polygons, 'loop_start', np.uint32)
+    __hash_foreach(h, blender_mesh.polygons, 'loop_total', np.uint32)
+    __hash_foreach(h, blender_mesh.polygons, 'material_index', np.uint32)
+
+    if export_settings[gltf2_blender_export_keys.NORMALS]:
+        # Split normals hold the smoothing, sharp edges and custom normals
+        blender_mesh.calc_normals_split()
+        __hash_foreach(h, blender_mesh.loops, 'normal', np.float32, 3)
+
+    h.update(repr([uv_layer.name for uv_layer in blender_mesh.uv_layers]).encode())
+    if blender_mesh.uv_layers.active is not None:
+        h.update(blender_mesh.uv_layers.active.name.encode())
+    for uv_layer in blender_mesh.uv_layers:
+        __hash_foreach(h, uv_layer.data, 'uv', np.float32, 2)
+    for vertex_color in blender_mesh.vertex_colors:
+        __hash_foreach(h, vertex_color.data, 'color', np.float32, 4)
+
+    if blender_mesh.shape_keys is not None:
+        for key_block in blender_mesh.shape_keys.key_blocks:
+            h.update(repr((key_block.name, key_block.mute, key_block.relative_key.name)).encode())
+            __hash_foreach(h, key_block.data, 'co', np.float32, 3)
+
+    armature, skin = gltf2_blender_extract.get_armature_and_skin(
+        blender_object, blender_vertex_groups, modifiers, export_settings)
+    if skin:
+        h.update(repr([joint.name for joint in skin.joints]).encode())
+        h.update(repr([group.name for group in blender_vertex_groups]).encode())
+        h.update(np.array(blender_object.matrix_world, dtype=np.float32).tobytes())
+        h.update(np.array(armature.matrix_world, dtype=np.float32).tobytes())
+        # The group count of each vertex tells which vertex each weight belongs to
+        group_counts, groups, weights = gltf2_blender_extract.get_vertex_group_elements(blender_mesh)
+        h.update(np.int64(len(group_counts)).tobytes())
+        h.update(group_counts.tobytes())
+        h.update(groups.tobytes())
+        h.update(weights.tobytes())
+
+    return h.hexdigest()
+
+
+def __hash_foreach(h, collection, attribute: str, dtype, width: int = 1):
+    array = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, array)
+    h.update(np.int64(len(array)).tobytes())
+    h.update(array.tobytes())
+
+
+def __load_entry(entry_directory: str) -> typing.Optional[typing.List[dict]]:
+    meta_path = os.path.join(entry_directory, __META_FILENAME)
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        primitives = []
+        for primitive_idx, primitive_meta in enumerate(meta['primitives']):
+            primitive = {
+                'attributes': {
+                    name: __load_array(entry_directory, primitive_idx, name) for name in primitive_meta['attributes']
+                },
+                'material': primitive_meta['material'],
+            }
+            if primitive_meta['indices']:
+                primitive['indices'] = __load_array(entry_directory, primitive_idx, 'indices')
+            if primitive_meta['mode'] is not None:
+                primitive['mode'] = primitive_meta['mode']
+            primitives.append(primitive)
+        # Mark the entry as recently used
+        os.utime(meta_path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return primitives
+
+
+def __load_array(entry_directory: str, primitive_idx: int, name: str) -> np.ndarray:
+    # Copy on write: the arrays may be modified in place while gathering, never the files
+    return np.asarray(np.load(os.path.join(entry_directory, '{}_{}.npy'.format(primitive_idx, name)), mmap_mode='c'))
+
+
+def __store_entry(cache_directory: str, entry_directory: str, primitives: typing.List[dict]):
+    os.makedirs(cache_directory, exist_ok=True)
+    if os.path.isdir(entry_directory):
+        # An incomplete entry, that could not be fully removed before
+        __remove_entry(entry_directory)
+    # Write in a temporary directory, then move it in place, so that there are never partial entries
+    temp_directory = tempfile.mkdtemp(dir=cache_directory, prefix='.tmp')
+    try:
+        meta = {'primitives': []}
+        for primitive_idx, primitive in enumerate(primitives):
+            for name, array in primitive['attributes'].items():
+                np.save(os.path.join(temp_directory, '{}_{}.npy'.format(primitive_idx, name)), array)
+            indices = primitive.get('indices')
+            if indices is not None:
+                np.save(os.path.join(temp_directory, '{}_indices.npy'.format(primitive_idx)), indices)
+            material = primitive.get('material')
+            meta['primitives'].append({
+                'attributes': list(primitive['attributes'].keys()),
+                'indices': indices is not None,
+                'material': int(material) if material is not None else None,
+                'mode': primitive.get('mode'),
+            })
+        with open(os.path.join(temp_directory, __META_FILENAME), 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_directory, entry_directory)
+    finally:
+        if os.path.isdir(temp_directory):
+            shutil.rmtree(temp_directory, ignore_errors=True)
+
+
+def __evict(cache_directory: str, size_limit: int, kept_keys: typing.Set[str]):
+    """
+    Remove the least recently used entries, until the cache fits in size_limit bytes. Kept entries stay.
+
+    Directories without description, left by a crashed export or only partly removed because some of their
+    files were still memory mapped, count towards the size and are removed first.
+    """
+    entries = []
+    total_size = 0
+    now = time.time()
+    for directory in os.scandir(cache_directory):
+        if not directory.is_dir():
+            continue
+        meta_path = os.path.join(directory.path, __META_FILENAME)
+        if not os.path.isfile(meta_path):
+            # Temporary directories may still be written by another export, unless they are old
+            if not directory.name.startswith('.tmp') or now - directory.stat().st_mtime > __STALE_TEMP_AGE:
+                __remove_entry(directory.path)
+            total_size += __get_directory_size(directory.path)
+            continue
+        size = __get_directory_size(directory.path)
+        entries.append((os.path.getmtime(meta_path), directory.name, size))
+        total_size += size
+
+    for _, key, size in sorted(entries):
+        if total_size <= size_limit:
+            break
+        if key in kept_keys:
+            continue
+        entry_directory = os.path.join(cache_directory, key)
+        __remove_entry(entry_directory)
+        total_size -= size - __get_directory_size(entry_directory)
+
+
+def __remove_entry(entry_directory: str):
+    """Remove an entry, its description first, so that it is never loaded with missing arrays."""
+    try:
+        os.remove(os.path.join(entry_directory, __META_FILENAME))
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return
+    shutil.rmtree(entry_directory, ignore_errors=True)
+
+
+def __get_directory_size(directory: str) -> int:
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,144 @@
+# Copyright 2018-2021 The glTF-Blender-IO authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import typing
+import numpy as np
+
+# Post-transform vertex cache size the triangles are ordered for, typical of current GPUs
+CACHE_SIZE = 16
+
+
+def optimize_primitive(primitive: typing.Dict, cache_size: int = CACHE_SIZE) -> typing.Tuple[float, float]:
+    """
+    Reorder the triangles of an extracted primitive for the vertex cache, then its vertices for fetching.
+
+    The indices and all the attributes of the primitive are replaced.
+    :return: the ACMR (average cache miss ratio) before and after
+    """
+    indices = primitive['indices']
+    vertex_count = len(primitive['attributes']['POSITION'])
+    acmr_before = get_acmr(indices, cache_size)
+
+    triangle_order = tipsify(indices, vertex_count, cache_size)
+    indices = indices.reshape(-1, 3)[triangle_order].reshape(-1)
+    indices, vertex_order = remap_vertex_fetch(indices, vertex_count)
+
+    primitive['indices'] = indices
+    primitive['attributes'] = {name: attribute[vertex_order] for name, attribute in primitive['attributes'].items()}
+    return acmr_before, get_acmr(indices, cache_size)
+
+
+def tipsify(indices: np.ndarray, vertex_count: int, cache_size: int = CACHE_SIZE) -> np.ndarray:
+    """
+    Get an order of the triangles with few vertex cache misses, with the Tipsify algorithm.
+
+    Triangles are emitted as fans around a vertex. The next fanning vertex is chosen among the vertices of the
+    last fan, as the one that is the most likely to still be in the cache after its own fan is emitted.
+    See Sander, Nehab and Barczak, "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw", 2007.
+    """
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return np.arange(0, dtype=np.int64)
+
+    # Vertex-triangle adjacency, as the triangles of each vertex, in order
+    valences = np.bincount(indices, minlength=vertex_count)
+    offsets = np.concatenate([[0], np.cumsum(valences)]).tolist()
+    adjacency = (np.argsort(indices, kind='stable') // 3).tolist()
+    triangles = indices.reshape(-1, 3).tolist()
+
+    # The loop only uses lists: indexing them is much faster than indexing arrays one item at a time
+    live = valences.tolist()
+    timestamps = [0] * vertex_count
+    emitted = [False] * triangle_count
+    order = []
+    dead_end = []
+    time = cache_size + 1
+    cursor = 0
+    fanning = 0
+
+    while fanning >= 0:
+        candidates = []
+        for t in adjacency[offsets[fanning]:offsets[fanning + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            order.append(t)
+            for v in triangles[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - timestamps[v] > cache_size:
+                    timestamps[v] = time
+                    time += 1
+
+        # Among the candidates with triangles left, the one that stays in the cache the longest
+        fanning = -1
+        best_priority = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time - timestamps[v] + 2 * live[v] <= cache_size:
+                    priority = time - timestamps[v]
+                if priority > best_priority:
+                    best_priority = priority
+                    fanning = v
+
+        if fanning == -1:
+            # Dead end: back to a recently used vertex, else to the next vertex in input order
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fanning = v
+                    break
+            else:
+                while cursor < vertex_count:
+                    if live[cursor] > 0:
+                        fanning = cursor
+                        break
+                    cursor += 1
+
+    return np.array(order, dtype=np.int64)
+
+
+def remap_vertex_fetch(indices: np.ndarray, vertex_count: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Renumber the vertices in the order of their first use, so that they are fetched sequentially.
+
+    :return: the new indices, and the old index of each new vertex. Unused vertices are moved last.
+    """
+    used, first_uses = np.unique(indices, return_index=True)
+    unused = np.setdiff1d(np.arange(vertex_count), used, assume_unique=True)
+    vertex_order = np.concatenate([used[np.argsort(first_uses, kind='stable')], unused])
+    remap = np.empty(vertex_count, dtype=indices.dtype)
+    remap[vertex_order] = np.arange(vertex_count, dtype=indices.dtype)
+    return remap[indices], vertex_order
+
+
+def get_acmr(indices: np.ndarray, cache_size: int = CACHE_SIZE) -> float:
+    """Get the average number of vertex cache misses per triangle, with a FIFO cache of cache_size vertices."""
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return 0.0
+    misses = 0
+    fifo = collections.deque()
+    cached = set()
+    for v in indices.tolist():
+        if v not in cached:
+            misses += 1
+            fifo.append(v)
+            cached.add(v)
+            if len(fifo) > cache_size:
+                cached.discard(fifo.popleft())
+    return misses / triangle_count
@@ -18,10 +18,17 @@ from ..com import gltf2_io_constants
 
 
 class BinaryData:
-    """Store for gltf binary data that can later be stored in a buffer."""
+    """Store for gltf binary data that can later be stored in a buffer.
 
-    def __init__(self, data: bytes):
-        if not isinstance(data, bytes):
+    The data is either bytes, or a read-only byte memoryview over the source array, so that
+    nothing is copied until the buffer is written to disk.
+    """
+
+    def __init__(self, data):
+        if isinstance(data, memoryview):
+            if data.format != 'B' or data.ndim != 1 or not data.readonly:
+                raise TypeError("Data is not a read-only byte memoryview")
+        elif not isinstance(data, bytes):
             raise TypeError("Data is not a bytes array")
         self.data = data
 
@@ -29,12 +36,22 @@ class BinaryData:
         return self.data == other.data
 
     def __hash__(self):
+        if isinstance(self.data, memoryview):
+            # views over numpy arrays are not hashable themselves
+            return hash(self.data.tobytes())
         return hash(self.data)
 
     @classmethod
     def from_list(cls, lst: typing.List[typing.Any], gltf_component_type: gltf2_io_constants.ComponentType):
         format_char = gltf2_io_constants.ComponentType.to_type_code(gltf_component_type)
-        return BinaryData(array.array(format_char, lst).tobytes())
+        return BinaryData(memoryview(array.array(format_char, lst)).cast('B').toreadonly())
+
+    @classmethod
+    def from_array(cls, np_array):
+        """Reference the memory of a numpy array, without copying it. The array must not be modified afterwards."""
+        import numpy as np
+        np_array = np.ascontiguousarray(np_array)
+        return BinaryData(memoryview(np_array.reshape(-1).view(np.uint8)).toreadonly())
 
     @property
     def byte_length(self):
@@ -18,23 +18,34 @@ from ..com import gltf2_io
 from . import gltf2_io_binary_data
 
 
+# zero padding chunks, shared by all buffers
+_PADDING = (b"", b"\x00", b"\x00" * 2, b"\x00" * 3)
+
+
 class Buffer:
-    """Class representing binary data for use in a glTF file as 'buffer' property."""
+    """Class representing binary data for use in a glTF file as 'buffer' property.
+
+    The binary data is never concatenated: the buffer keeps a list of chunks (the data of each
+    added BinaryData and its padding), and streams them to the file when it is written.
+    """
 
     def __init__(self, buffer_index=0):
-        self.__data = bytearray(b"")
+        self.__chunks = []
+        self.__byte_length = 0
         self.__buffer_index = buffer_index
 
     def add_and_get_view(self, binary_data: gltf2_io_binary_data.BinaryData) -> gltf2_io.BufferView:
         """Add binary data to the buffer. Return a glTF BufferView."""
-        offset = len(self.__data)
-        self.__data.extend(binary_data.data)
-
+        offset = self.__byte_length
         length = binary_data.byte_length
 
         # offsets should be a multiple of 4 --> therefore add padding if necessary
         padding = (4 - (length % 4)) % 4
-        self.__data.extend(b"\x00" * padding)
+
+        self.__chunks.append(binary_data.data)
+        if padding:
+            self.__chunks.append(_PADDING[padding])
+        self.__byte_length += length + padding
 
         buffer_view = gltf2_io.BufferView(
             buffer=self.__buffer_index,
@@ -50,13 +61,18 @@ class Buffer:
 
     @property
     def byte_length(self):
-        return len(self.__data)
+        return self.__byte_length
+
+    def write_to(self, file):
+        """Write the buffer to a file opened in binary mode, chunk by chunk."""
+        file.writelines(self.__chunks)
 
     def to_bytes(self):
-        return self.__data
+        return b"".join(self.__chunks)
 
     def to_embed_string(self):
-        return 'data:application/octet-stream;base64,' + base64.b64encode(self.__data).decode('ascii')
+        return 'data:application/octet-stream;base64,' + base64.b64encode(self.to_bytes()).decode('ascii')
 
     def clear(self):
-        self.__data = b""
+        self.__chunks = []
+        self.__byte_length = 0
@@ -136,10 +136,10 @@ def __encode_primitive(primitive, dll, export_settings, encoded_primitives_cache
     draco_ids = {}
     for attr_name in attributes:
         attr = attributes[attr_name]
-        draco_id = dll.encoderSetAttribute(encoder, attr_name.encode(), attr.component_type, attr.type.encode(), attr.buffer_view.data)
+        draco_id = dll.encoderSetAttribute(encoder, attr_name.encode(), attr.component_type, attr.type.encode(), bytes(attr.buffer_view.data))
         draco_ids[attr_name] = draco_id
 
-    dll.encoderSetIndices(encoder, indices.component_type, indices.count, indices.buffer_view.data)
+    dll.encoderSetIndices(encoder, indices.component_type, indices.count, bytes(indices.buffer_view.data))
 
     dll.encoderSetCompressionLevel(encoder, export_settings['gltf_draco_mesh_compression_level'])
     dll.encoderSetQuantizationBits(encoder,
@@ -19,6 +19,8 @@
 import json
 import struct
 
+from . import gltf2_io_buffer
+
 #
 # Globals
 #
@@ -30,6 +32,12 @@ from collections import OrderedDict
 
 
 def save_gltf(gltf, export_settings, encoder, glb_buffer):
+    """
+    Write the glTF file(s).
+
+    For GLB, glb_buffer is either bytes or the exporter's Buffer. A Buffer is streamed into
+    the BIN chunk chunk by chunk, so the binary data is never joined in memory.
+    """
     indent = None
     separators = (',', ':')
 
@@ -86,7 +94,7 @@ def save_gltf(gltf, export_settings, encoder, glb_buffer):
         spaces_gltf = (4 - (length_gltf & 3)) & 3
         length_gltf += spaces_gltf
 
-        length_bin = len(binary)
+        length_bin = __binary_byte_length(binary)
         zeros_bin = (4 - (length_bin & 3)) & 3
         length_bin += zeros_bin
 
@@ -109,9 +117,22 @@ def save_gltf(gltf, export_settings, encoder, glb_buffer):
         if length_bin > 0:
             file.write(struct.pack("I", length_bin))
             file.write('BIN\0'.encode())
-            file.write(binary)
+            __write_binary(file, binary)
             file.write(b'\0' * zeros_bin)
 
         file.close()
 
     return True
+
+
+def __binary_byte_length(binary):
+    if isinstance(binary, gltf2_io_buffer.Buffer):
+        return binary.byte_length
+    return len(binary)
+
+
+def __write_binary(file, binary):
+    if isinstance(binary, gltf2_io_buffer.Buffer):
+        binary.write_to(file)
+    else:
+        file.write(binary)